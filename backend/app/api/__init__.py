@@ -1,6 +1,6 @@
 """
 API package
 """
-from . import tasks
+from . import tasks, transfer, archive, history
 
-__all__ = ['tasks']
+__all__ = ['tasks', 'transfer', 'archive', 'history']
@@ -0,0 +1,113 @@
+"""
+REST API endpoints архива завершённых задач (только чтение и восстановление)
+"""
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from typing import List
+import logging
+
+from ..database import get_db
+from ..models import ArchivedTask
+from ..schemas import TaskResponse, ArchivedTaskResponse
+from ..websocket import manager
+from ..services import deadline_watcher, board_summary, restore_task
+from .tasks import get_session_id, serialize_task, set_etag
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/archive", tags=["archive"])
+
+
+@router.get("/", response_model=List[ArchivedTaskResponse])
+async def get_archived_tasks(
+    limit: int = Query(50, ge=1, le=500, description="Размер страницы"),
+    offset: int = Query(0, ge=0, description="Смещение"),
+    db: Session = Depends(get_db)
+):
+    """
+    Получить архивные задачи, последние завершённые первыми
+
+    Args:
+        limit: Размер страницы
+        offset: Смещение
+
+    Returns:
+        List[ArchivedTaskResponse]: Страница архива
+    """
+    tasks = (
+        db.query(ArchivedTask)
+        .order_by(ArchivedTask.completed_at.desc(), ArchivedTask.id.desc())
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+    logger.info(f"🗄️  Получено архивных задач: {len(tasks)} (offset={offset})")
+    return tasks
+
+
+@router.get("/{task_id}/", response_model=ArchivedTaskResponse)
+async def get_archived_task(task_id: int, db: Session = Depends(get_db)):
+    """
+    Получить архивную задачу по ID
+
+    Raises:
+        HTTPException: 404 если задачи нет в архиве
+    """
+    task = db.query(ArchivedTask).filter(ArchivedTask.id == task_id).first()
+    if not task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Задача с ID {task_id} не найдена в архиве"
+        )
+    return task
+
+
+@router.post("/{task_id}/restore", response_model=TaskResponse)
+async def restore_archived_task(
+    task_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
+    """
+    Вернуть задачу из архива в рабочую таблицу
+
+    Статус и версия задачи не меняются, момент завершения становится
+    текущим (задача снова отсчитывает ARCHIVE_AFTER_DAYS). Задачи в архиве
+    также восстанавливаются автоматически при PUT / PATCH.
+
+    Returns:
+        TaskResponse: Восстановленная задача
+
+    Raises:
+        HTTPException: 404 если задачи нет в архиве, 409 при конфликте ID / key
+    """
+    session_id = get_session_id(request)
+
+    try:
+        db_task = restore_task(db, task_id, session_id)
+        if db_task is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Задача с ID {task_id} не найдена в архиве"
+            )
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Задача с ID или key задачи {task_id} уже есть в рабочей таблице"
+        )
+
+    deadline_watcher.track(db_task)
+
+    await manager.broadcast({
+        "type": "task_created",
+        "task": serialize_task(db_task),
+        "session_id": session_id
+    })
+    await board_summary.publish(session_id)
+
+    set_etag(response, db_task)
+    return db_task
@@ -0,0 +1,116 @@
+"""
+REST API endpoints истории изменений задач (журнал и состояние на момент времени)
+"""
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import OperationalError
+from datetime import datetime, timezone
+from typing import List, Optional
+import logging
+import time
+
+from ..database import get_db
+from ..schemas import TaskResponse, TaskChangeResponse
+from ..services import task_changes, task_as_of, board_as_of, take_snapshot
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/history", tags=["history"])
+
+
+def to_utc(at: datetime) -> datetime:
+    """Момент времени в UTC без часового пояса (так хранятся даты в БД)"""
+    if at.tzinfo is not None:
+        return at.astimezone(timezone.utc).replace(tzinfo=None)
+    return at
+
+
+@router.get("/tasks/{task_id}", response_model=List[TaskChangeResponse])
+async def get_task_history(
+    task_id: int,
+    limit: int = Query(100, ge=1, le=1000, description="Размер страницы"),
+    offset: int = Query(0, ge=0, description="Смещение"),
+    db: Session = Depends(get_db)
+):
+    """
+    Журнал изменений задачи, новые записи первыми
+
+    Returns:
+        List[TaskChangeResponse]: Кто, когда и какие поля изменил
+    """
+    return task_changes(db, task_id, limit=limit, offset=offset)
+
+
+@router.get("/tasks/{task_id}/as-of", response_model=TaskResponse)
+async def get_task_as_of(
+    task_id: int,
+    at: datetime = Query(..., description="Момент времени (ISO 8601, без пояса - UTC)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Состояние задачи на момент времени
+
+    Raises:
+        HTTPException: 404 если задачи в этот момент не было
+    """
+    state = task_as_of(db, task_id, to_utc(at))
+    if state is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Задача с ID {task_id} не найдена на {at.isoformat()}"
+        )
+    return state
+
+
+@router.get("/board", response_model=List[TaskResponse])
+async def get_board_as_of(
+    at: datetime = Query(..., description="Момент времени (ISO 8601, без пояса - UTC)"),
+    task_status: Optional[str] = Query(None, alias="status", description="Фильтр по статусу"),
+    priority: Optional[str] = Query(None, description="Фильтр по приоритету"),
+    assignee: Optional[str] = Query(None, description="Фильтр по исполнителю"),
+    sprint_id: Optional[int] = Query(None, description="Фильтр по спринту"),
+    db: Session = Depends(get_db)
+):
+    """
+    Состояние доски на момент времени
+
+    Восстанавливается от ближайшего предшествующего снимка воспроизведением
+    журнала; фильтры применяются к восстановленному состоянию.
+
+    Returns:
+        List[TaskResponse]: Задачи, существовавшие в этот момент
+    """
+    started = time.perf_counter()
+    tasks = board_as_of(db, to_utc(at), {
+        "status": task_status,
+        "priority": priority,
+        "assignee": assignee,
+        "sprint_id": sprint_id,
+    })
+    logger.info(f"🕰️  Доска на {at.isoformat()}: {len(tasks)} задач за "
+                f"{(time.perf_counter() - started) * 1000:.1f} мс")
+    return tasks
+
+
+@router.post("/snapshots", status_code=status.HTTP_201_CREATED)
+async def create_snapshot(db: Session = Depends(get_db)):
+    """
+    Сделать снимок истории сейчас (обычно снимки делает фоновый цикл)
+
+    Returns:
+        dict: ID снимка, момент и число задач в нём (null, если изменений не было)
+
+    Raises:
+        HTTPException: 503 если не дождались транзакций, пишущих в журнал
+    """
+    try:
+        snapshot = take_snapshot(db)
+    except OperationalError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Журнал изменений занят длинной транзакцией, повторите снимок позже"
+        )
+    if snapshot is None:
+        return {"snapshot_id": None, "taken_at": None, "task_count": 0}
+    logger.info(f"📸 Снимок истории по запросу: задач {snapshot.task_count}")
+    return {"snapshot_id": snapshot.id, "taken_at": snapshot.taken_at, "task_count": snapshot.task_count}
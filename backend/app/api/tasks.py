@@ -1,16 +1,23 @@
 """
 REST API endpoints для работы с задачами
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import case
-from typing import List
+from sqlalchemy import case, update, delete, func
+from datetime import datetime
+from typing import List, Optional, Union
 import logging
+import time
 
 from ..database import get_db
-from ..models import Task
-from ..schemas import TaskCreate, TaskUpdate, TaskResponse
+from ..models import Task, ArchivedTask
+from ..schemas import TaskCreate, TaskUpdate, TaskResponse, DueTaskResponse, TaskSummaryResponse, NextTaskResponse
 from ..websocket import manager
+from ..services import (
+    deadline_watcher, board_summary, parse_duration, restore_task, find_next_tasks, DONE_STATUS,
+    record_created, record_updated, record_deleted
+)
+from ..monitoring import profile_section
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +43,12 @@ def generate_task_key(task_id: int) -> str:
     return f"TASK-{task_id}"
 
 
+def serialize_task(task: Task) -> dict:
+    """Сериализовать задачу для WebSocket сообщения"""
+    with profile_section("serialization"):
+        return TaskResponse.model_validate(task).model_dump(mode='json')
+
+
 @router.get("/", response_model=List[TaskResponse])
 async def get_tasks(db: Session = Depends(get_db)):
     """
@@ -56,11 +69,123 @@ async def get_tasks(db: Session = Depends(get_db)):
     return tasks
 
 
+@router.get("/due", response_model=List[DueTaskResponse])
+async def get_due_tasks(
+    within: str = Query("1d", description="Окно вперёд от текущего момента: 30m / 4h / 2d / 1w"),
+    kind: Optional[str] = Query(None, pattern="^(due|sla)$", description="Вид дедлайна"),
+    db: Session = Depends(get_db)
+):
+    """
+    Получить задачи с дедлайнами в ближайшем окне (включая уже просроченные)
+
+    Выборка идёт по индексу дедлайнов deadline_watcher, из БД загружаются
+    только попавшие в окно задачи.
+
+    Args:
+        within: Длительность окна
+        kind: Фильтр по виду дедлайна (due / sla)
+
+    Returns:
+        List[DueTaskResponse]: Дедлайны, отсортированные по времени
+
+    Raises:
+        HTTPException: 422 если within не удалось разобрать
+    """
+    window = parse_duration(within)
+    if window is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Некорректная длительность: '{within}'"
+        )
+
+    now = datetime.utcnow()
+    entries = deadline_watcher.upcoming(now + window, kind=kind)
+    if not entries:
+        return []
+
+    task_ids = {task_id for _, task_id, _ in entries}
+    tasks = {task.id: task for task in db.query(Task).filter(Task.id.in_(task_ids)).all()}
+
+    logger.info(f"⏰ Дедлайнов в окне {within}: {len(entries)}")
+    return [
+        DueTaskResponse(
+            kind=deadline_kind,
+            deadline=deadline,
+            overdue=deadline <= now,
+            task=TaskResponse.model_validate(tasks[task_id])
+        )
+        for deadline, task_id, deadline_kind in entries
+        if task_id in tasks
+    ]
+
+
+@router.get("/next", response_model=List[NextTaskResponse])
+async def get_next_tasks(
+    location: Optional[str] = Query(None, description="Где я: Дом / Работа"),
+    tools: Optional[List[str]] = Query(None, description="Доступные инструменты (можно через запятую)"),
+    environment: Optional[str] = Query(None, description="Окружение: Тишина / Фон"),
+    connectivity: Optional[str] = Query(None, description="Сеть: Online / Offline"),
+    execution_mode: Optional[str] = Query(None, description="Режим: Solo / Async / Sync"),
+    maintenance_level: Optional[str] = Query(None, description="Только задачи уровня Core / Optional"),
+    limit: int = Query(5, ge=1, le=50, description="Сколько задач вернуть"),
+    db: Session = Depends(get_db)
+):
+    """
+    Что можно сделать прямо сейчас
+
+    Открытые задачи фильтруются по контексту (пустое поле задачи подходит
+    для любого контекста), заблокированные незавершёнными задачами
+    исключаются, остальные ранжируются по приоритету, сроку и штрафу
+    за пропуск.
+
+    Returns:
+        List[NextTaskResponse]: До limit задач по убыванию балла
+    """
+    started = time.perf_counter()
+    if tools is not None:
+        tools = [tool for value in tools for tool in value.split(",")]
+
+    results = find_next_tasks(
+        db,
+        location=location,
+        tools=tools,
+        environment=environment,
+        connectivity=connectivity,
+        execution_mode=execution_mode,
+        maintenance_level=maintenance_level,
+        limit=limit,
+    )
+
+    logger.info(f"🎯 Подобрано задач под контекст: {len(results)} за {(time.perf_counter() - started) * 1000:.1f} мс")
+    return [
+        NextTaskResponse(score=score, reasons=reasons, task=TaskResponse.model_validate(task))
+        for task, score, reasons in results
+    ]
+
+
+@router.get("/summary", response_model=TaskSummaryResponse)
+async def get_summary(db: Session = Depends(get_db)):
+    """
+    Получить сводку по доске: количество задач по статусу, приоритету,
+    исполнителю и спринту
+
+    Счётчики поддерживаются триггерами в таблице task_summary при каждом
+    изменении задач: запрос читает десятки строк, а не все задачи.
+
+    Returns:
+        TaskSummaryResponse: Текущие счётчики
+    """
+    return board_summary.snapshot(db)
+
+
 @router.get("/{task_id}/", response_model=TaskResponse)
-async def get_task(task_id: int, db: Session = Depends(get_db)):
+async def get_task(task_id: int, response: Response, db: Session = Depends(get_db)):
     """
     Получить задачу по ID
 
+    Задача, перенесённая в архив, тоже отдаётся (только чтение,
+    при изменении она вернётся в рабочую таблицу).
+
     Args:
         task_id: ID задачи
 
@@ -71,11 +196,14 @@ async def get_task(task_id: int, db: Session = Depends(get_db)):
         HTTPException: 404 если задача не найдена
     """
     task = db.query(Task).filter(Task.id == task_id).first()
+    if not task:
+        task = db.query(ArchivedTask).filter(ArchivedTask.id == task_id).first()
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Задача с ID {task_id} не найдена"
         )
+    set_etag(response, task)
     return task
 
 
@@ -83,6 +211,7 @@ async def get_task(task_id: int, db: Session = Depends(get_db)):
 async def create_task(
     task_data: TaskCreate,
     request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """
@@ -99,76 +228,208 @@ async def create_task(
 
     # Создаём задачу
     db_task = Task(**task_data.model_dump())
+    if db_task.status == DONE_STATUS:
+        db_task.completed_at = datetime.utcnow()
     db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
+    db.flush()
 
     # Генерируем уникальный ключ после получения ID
     if not db_task.key:
         db_task.key = generate_task_key(db_task.id)
-        db.commit()
-        db.refresh(db_task)
+
+    # Задача, ключ и запись журнала фиксируются одной транзакцией
+    record_created(db, db_task, session_id)
+    db.commit()
+    db.refresh(db_task)
+
+    deadline_watcher.track(db_task)
 
     logger.info(f"✅ Задача создана: ID={db_task.id}, key='{db_task.key}', title='{db_task.title}', session={session_id}")
 
     # Отправляем обновление всем подключенным клиентам
     await manager.broadcast({
         "type": "task_created",
-        "task": TaskResponse.model_validate(db_task).model_dump(mode='json'),
+        "task": serialize_task(db_task),
         "session_id": session_id  # ← ДОБАВЛЕНО
     })
+    await board_summary.publish(session_id)
 
+    set_etag(response, db_task)
     return db_task
 
 
+def parse_if_match(request: Request) -> Optional[int]:
+    """
+    Получить ожидаемую версию задачи из заголовка If-Match
+
+    Принимаются значения вида "3", W/"3" и 3. Отсутствующий заголовок
+    или * означает обновление без проверки версии.
+
+    Raises:
+        HTTPException: 400 если значение не является версией
+    """
+    value = request.headers.get("If-Match")
+    if value is None or value.strip() == "*":
+        return None
+    tag = value.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    try:
+        return int(tag.strip('"'))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Некорректный If-Match: {value}"
+        )
+
+
+def set_etag(response: Response, task: Union[Task, TaskResponse]):
+    """Выставить ETag с версией задачи"""
+    response.headers["ETag"] = f'"{task.version}"'
+
+
+def _raise_missing_or_conflict(db: Session, task_id: int, expected_version: Optional[int]):
+    """Условный запрос не затронул строку - выяснить, почему (только на пути ошибки)"""
+    current_version = db.query(Task.version).filter(Task.id == task_id).scalar()
+    if current_version is None:
+        current_version = db.query(ArchivedTask.version).filter(ArchivedTask.id == task_id).scalar()
+    if current_version is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Задача с ID {task_id} не найдена"
+        )
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Конфликт версий задачи {task_id}: ожидалась {expected_version}, текущая {current_version}"
+    )
+
+
+async def _update_task(
+    task_id: int,
+    task_data: TaskUpdate,
+    request: Request,
+    response: Response,
+    db: Session
+) -> Union[Task, TaskResponse]:
+    """
+    Применить частичное обновление одним UPDATE ... RETURNING
+
+    Версия увеличивается в том же запросе; при If-Match условие на версию
+    добавляется в WHERE, и конфликт возвращается как 409. В журнал пишутся
+    новые значения переданных полей из RETURNING - без отдельного чтения.
+    """
+    session_id = get_session_id(request)
+    expected_version = parse_if_match(request)
+
+    # Обновляем только переданные поля
+    update_data = task_data.model_dump(exclude_unset=True)
+    if not update_data:
+        db_task = db.query(Task).filter(Task.id == task_id).first()
+        if not db_task or (expected_version is not None and db_task.version != expected_version):
+            _raise_missing_or_conflict(db, task_id, expected_version)
+        set_etag(response, db_task)
+        return db_task
+
+    # Момент завершения ставится при переходе в Done и снимается при переоткрытии
+    if "status" in update_data and "completed_at" not in update_data:
+        if update_data["status"] == DONE_STATUS:
+            update_data["completed_at"] = func.coalesce(Task.completed_at, datetime.utcnow())
+        else:
+            update_data["completed_at"] = None
+
+    stmt = update(Task).where(Task.id == task_id)
+    if expected_version is not None:
+        stmt = stmt.where(Task.version == expected_version)
+    stmt = (
+        stmt.values(**update_data, version=Task.version + 1)
+        .returning(Task)
+        .execution_options(populate_existing=True)
+    )
+    db_task = db.scalars(stmt).first()
+    restored = False
+    if db_task is None and restore_task(db, task_id, session_id) is not None:
+        # Задача в архиве - возвращаем её в рабочую таблицу в той же транзакции
+        restored = True
+        db_task = db.scalars(stmt).first()
+    if db_task is None:
+        db.rollback()
+        _raise_missing_or_conflict(db, task_id, expected_version)
+    record_updated(db, db_task, update_data, session_id)
+    # Ответ собирается из строки RETURNING до commit: после commit объект
+    # истекает, и любое обращение к нему стоило бы ещё одного SELECT
+    with profile_section("serialization"):
+        task = TaskResponse.model_validate(db_task)
+    db.commit()
+
+    deadline_watcher.track(task)
+
+    logger.info(f"✏️ Задача обновлена: ID={task.id}, version={task.version}, session={session_id}")
+
+    # Отправляем обновление всем подключенным клиентам
+    # (восстановленная из архива задача для клиентов появляется заново)
+    await manager.broadcast({
+        "type": "task_created" if restored else "task_updated",
+        "task": task.model_dump(mode='json'),
+        "session_id": session_id  # ← ДОБАВЛЕНО
+    })
+    await board_summary.publish(session_id)
+
+    set_etag(response, task)
+    return task
+
+
 @router.put("/{task_id}/", response_model=TaskResponse)
 async def update_task(
     task_id: int,
     task_data: TaskUpdate,
     request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """
-    Обновить задачу
+    Обновить задачу (передаются только изменяемые поля, как в PATCH)
 
     Args:
         task_id: ID задачи
         task_data: Данные для обновления
-        request: HTTP запрос (для получения session_id)
+        request: HTTP запрос (для получения session_id и If-Match)
 
     Returns:
         TaskResponse: Обновлённая задача
 
     Raises:
-        HTTPException: 404 если задача не найдена
+        HTTPException: 404 если задача не найдена, 409 при конфликте версий
     """
-    session_id = get_session_id(request)
+    return await _update_task(task_id, task_data, request, response, db)
 
-    db_task = db.query(Task).filter(Task.id == task_id).first()
-    if not db_task:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Задача с ID {task_id} не найдена"
-        )
 
-    # Обновляем только переданные поля
-    update_data = task_data.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_task, key, value)
+@router.patch("/{task_id}/", response_model=TaskResponse)
+async def patch_task(
+    task_id: int,
+    task_data: TaskUpdate,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
+    """
+    Частично обновить задачу
 
-    db.commit()
-    db.refresh(db_task)
+    Обновление выполняется одним запросом к БД. С заголовком If-Match
+    (версия из ETag) обновление применяется, только если задачу никто
+    не изменил с момента чтения.
 
-    logger.info(f"✏️ Задача обновлена: ID={db_task.id}, session={session_id}")
+    Args:
+        task_id: ID задачи
+        task_data: Изменяемые поля
+        request: HTTP запрос (для получения session_id и If-Match)
 
-    # Отправляем обновление всем подключенным клиентам
-    await manager.broadcast({
-        "type": "task_updated",
-        "task": TaskResponse.model_validate(db_task).model_dump(mode='json'),
-        "session_id": session_id  # ← ДОБАВЛЕНО
-    })
+    Returns:
+        TaskResponse: Обновлённая задача
 
-    return db_task
+    Raises:
+        HTTPException: 404 если задача не найдена, 409 при конфликте версий
+    """
+    return await _update_task(task_id, task_data, request, response, db)
 
 
 @router.delete("/{task_id}/", status_code=status.HTTP_204_NO_CONTENT)
@@ -182,23 +443,32 @@ async def delete_task(
 
     Args:
         task_id: ID задачи
-        request: HTTP запрос (для получения session_id)
+        request: HTTP запрос (для получения session_id и If-Match)
 
     Raises:
-        HTTPException: 404 если задача не найдена
+        HTTPException: 404 если задача не найдена, 409 при конфликте версий
     """
     session_id = get_session_id(request)
-
-    db_task = db.query(Task).filter(Task.id == task_id).first()
-    if not db_task:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Задача с ID {task_id} не найдена"
-        )
-
-    db.delete(db_task)
+    expected_version = parse_if_match(request)
+
+    stmt = delete(Task).where(Task.id == task_id)
+    if expected_version is not None:
+        stmt = stmt.where(Task.version == expected_version)
+    deleted_version = db.scalars(stmt.returning(Task.version)).first()
+    if deleted_version is None:
+        # Задача могла быть перенесена в архив - удаляем оттуда
+        archived = delete(ArchivedTask).where(ArchivedTask.id == task_id)
+        if expected_version is not None:
+            archived = archived.where(ArchivedTask.version == expected_version)
+        deleted_version = db.scalars(archived.returning(ArchivedTask.version)).first()
+        if deleted_version is None:
+            db.rollback()
+            _raise_missing_or_conflict(db, task_id, expected_version)
+    record_deleted(db, task_id, deleted_version, session_id)
     db.commit()
 
+    deadline_watcher.untrack(task_id)
+
     logger.info(f"🗑️  Задача удалена: ID={task_id}, session={session_id}")
 
     # Отправляем обновление всем подключенным клиентам
@@ -207,5 +477,6 @@ async def delete_task(
         "task_id": task_id,
         "session_id": session_id  # ← ДОБАВЛЕНО
     })
+    await board_summary.publish(session_id)
 
     return None
\ No newline at end of file
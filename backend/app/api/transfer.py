@@ -0,0 +1,346 @@
+"""
+REST API endpoints для потокового экспорта и импорта задач (NDJSON / CSV)
+"""
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select, insert, update, cast, String, text
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterator, List
+import csv
+import io
+import json
+import logging
+import os
+
+from ..database import get_db, SessionLocal
+from ..models import Task, ArchivedTask
+from ..schemas import TaskExport, TaskImport
+from ..websocket import manager, event_relay
+from ..services import deadline_watcher, board_summary, record_imported, record_archived
+from .tasks import get_session_id
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/tasks", tags=["transfer"])
+
+# Сколько строк читать из курсора за раз при экспорте
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+
+# Сколько строк вставлять в одной транзакции при импорте
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+
+# Колонки CSV совпадают с полями TaskResponse плюс archived_at
+CSV_COLUMNS = list(TaskExport.model_fields.keys())
+
+# Поля, которые в CSV хранятся как JSON строки
+JSON_FIELDS = {"watchers", "subtasks", "dependencies", "links", "labels", "components", "tools_required"}
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _iter_tasks(include_archive: bool) -> Iterator[TaskExport]:
+    """
+    Читать задачи из БД порциями через серверный курсор
+
+    Сначала рабочая таблица, затем (include_archive) архив. Сессия
+    открывается внутри генератора, чтобы жить ровно столько, сколько
+    длится отдача ответа.
+    """
+    db = SessionLocal()
+    try:
+        for model in (Task, ArchivedTask) if include_archive else (Task,):
+            result = db.execute(
+                select(model).order_by(model.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+            )
+            for task in result.scalars():
+                yield TaskExport.model_validate(task)
+    finally:
+        db.close()
+
+
+def _iter_ndjson(include_archive: bool) -> Iterator[str]:
+    count = 0
+    for task in _iter_tasks(include_archive):
+        count += 1
+        yield task.model_dump_json() + "\n"
+    logger.info(f"📤 Экспорт NDJSON завершён: {count} задач")
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def _iter_csv(include_archive: bool) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+
+    count = 0
+    for task in _iter_tasks(include_archive):
+        data = task.model_dump(mode="json")
+        writer.writerow([_csv_value(data[column]) for column in CSV_COLUMNS])
+        count += 1
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    yield buffer.getvalue()
+    logger.info(f"📤 Экспорт CSV завершён: {count} задач")
+
+
+@router.get("/export")
+async def export_tasks(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    include_archive: bool = Query(True, description="Добавить задачи из архива (с заполненным archived_at)")
+):
+    """
+    Потоковый экспорт всех задач
+
+    Строки отдаются по мере чтения из курсора, память не зависит от размера таблицы.
+    Задачи из архива идут после рабочих и отличаются заполненным archived_at -
+    импорт возвращает их в архив.
+
+    Args:
+        format: ndjson или csv
+        include_archive: Экспортировать и архив
+
+    Returns:
+        StreamingResponse: Файл с задачами
+    """
+    filename = f"tasks-{datetime.utcnow():%Y%m%d-%H%M%S}.{format}"
+    body = _iter_ndjson(include_archive) if format == "ndjson" else _iter_csv(include_archive)
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+async def _iter_lines(request: Request) -> AsyncIterator[str]:
+    """Разбить тело запроса на строки по мере поступления"""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8").rstrip("\r")
+
+
+async def _iter_ndjson_rows(request: Request) -> AsyncIterator[Dict]:
+    async for line in _iter_lines(request):
+        if line.strip():
+            yield json.loads(line)
+
+
+async def _iter_csv_rows(request: Request) -> AsyncIterator[Dict]:
+    header = None
+    record = ""
+    async for line in _iter_lines(request):
+        # Поле в кавычках может содержать перевод строки - копим до чётного числа кавычек
+        record = f"{record}\n{line}" if record else line
+        if record.count('"') % 2:
+            continue
+
+        values = next(csv.reader([record]))
+        record = ""
+        if header is None:
+            header = values
+            continue
+        if not any(values):
+            continue
+
+        row = {}
+        for column, value in zip(header, values):
+            if value == "":
+                row[column] = None
+            elif column in JSON_FIELDS:
+                row[column] = json.loads(value)
+            else:
+                row[column] = value
+        yield row
+
+
+def _insert_chunk(db: Session, rows: List[Dict], session_id: str) -> int:
+    """
+    Вставить порцию задач одной транзакцией (вместе с записями журнала)
+
+    Строки с archived_at попадают в архив (в журнале - создание и перенос
+    в архив), остальные - в рабочую таблицу.
+
+    Returns:
+        int: Сколько задач порции вставлено в архив
+
+    Raises:
+        IntegrityError: Конфликт id / key, в том числе между рабочей таблицей и архивом
+    """
+    tasks = [row for row in rows if row["archived_at"] is None]
+    archived = [row for row in rows if row["archived_at"] is not None]
+    for row in tasks:
+        row.pop("archived_at")
+
+    task_ids = db.scalars(insert(Task).returning(Task.id), tasks).all() if tasks else []
+    # Ключи для задач без key генерируются так же, как в create_task
+    db.execute(
+        update(Task)
+        .where(Task.key.is_(None))
+        .values(key="TASK-" + cast(Task.id, String))
+    )
+    moved = []
+    if archived:
+        for row in archived:
+            row["key"] = row["key"] or f"TASK-{row['id']}"
+        moved = db.execute(insert(ArchivedTask).returning(ArchivedTask.id, ArchivedTask.version), archived).all()
+
+    # Один ID не может быть и в рабочей таблице, и в архиве - PK этого не проверяет
+    duplicate = None
+    if task_ids:
+        duplicate = db.scalar(select(ArchivedTask.id).where(ArchivedTask.id.in_(task_ids)).limit(1))
+    if duplicate is None and moved:
+        duplicate = db.scalar(select(Task.id).where(Task.id.in_([row.id for row in moved])).limit(1))
+    if duplicate is not None:
+        raise IntegrityError(f"Задача {duplicate} есть и в рабочей таблице, и в архиве", None, None)
+
+    if any("id" in row for row in rows):
+        _sync_id_sequence(db)
+    record_imported(db, [*task_ids, *(row.id for row in moved)], session_id)
+    record_archived(db, moved, session_id)
+    db.commit()
+    return len(moved)
+
+
+def _sync_id_sequence(db: Session):
+    """
+    Сдвинуть счётчик tasks.id за максимальный ID рабочей таблицы и архива
+
+    Импорт сохраняет переданные id, а SERIAL в PostgreSQL об этом не знает -
+    без сдвига следующий create_task получил бы уже занятый ID (в том числе
+    ID задачи из архива). В SQLite tasks объявлена с AUTOINCREMENT:
+    sqlite_sequence учитывает ID, вставленные в tasks, но не в архив.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        db.execute(text(
+            "INSERT INTO sqlite_sequence (name, seq) SELECT 'tasks', 0 "
+            "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'tasks')"
+        ))
+        db.execute(text(
+            "UPDATE sqlite_sequence SET seq = MAX(seq, (SELECT COALESCE(MAX(id), 0) FROM tasks_archive)) "
+            "WHERE name = 'tasks'"
+        ))
+        return
+    db.execute(text(
+        "SELECT setval(pg_get_serial_sequence('tasks', 'id'), "
+        "GREATEST((SELECT COALESCE(MAX(id), 0) FROM tasks), (SELECT COALESCE(MAX(id), 0) FROM tasks_archive), 1))"
+    ))
+
+
+@router.post("/import")
+async def import_tasks(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    Потоковый импорт задач
+
+    Тело разбирается построчно, задачи вставляются порциями по IMPORT_CHUNK_SIZE
+    в отдельных транзакциях. Поля id / key / created_at сохраняются, если переданы.
+    Задачи с archived_at (архив из экспорта) возвращаются в архив, для них id обязателен.
+
+    Args:
+        request: HTTP запрос с телом в формате NDJSON или CSV
+        format: ndjson или csv
+
+    Returns:
+        dict: Количество импортированных задач (из них в архив) и транзакций
+
+    Raises:
+        HTTPException: 422 при ошибке разбора строки, 409 при конфликте ID/key
+    """
+    session_id = get_session_id(request)
+    rows_iter = _iter_ndjson_rows(request) if format == "ndjson" else _iter_csv_rows(request)
+
+    imported = 0
+    archived = 0
+    chunks = 0
+    line_no = 0
+    chunk: List[Dict] = []
+    completed = False
+
+    try:
+        async for raw in rows_iter:
+            line_no += 1
+            try:
+                row = TaskImport.model_validate(raw).model_dump()
+            except ValidationError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=f"Ошибка в записи {line_no}: {e.errors()[0]['msg']}. Импортировано: {imported}"
+                )
+            if row["archived_at"] is not None and row["id"] is None:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=f"Ошибка в записи {line_no}: у архивной задачи (archived_at) нужен id. "
+                           f"Импортировано: {imported}"
+                )
+            # Незаданные служебные поля заполняются значениями по умолчанию из модели
+            for field in ("id", "created_at", "updated_at", "version"):
+                if row[field] is None:
+                    row.pop(field)
+            chunk.append(row)
+
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                archived += _insert_chunk(db, chunk, session_id)
+                imported += len(chunk)
+                chunks += 1
+                chunk = []
+
+        if chunk:
+            archived += _insert_chunk(db, chunk, session_id)
+            imported += len(chunk)
+            chunks += 1
+        completed = True
+    except (json.JSONDecodeError, csv.Error, UnicodeDecodeError) as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Ошибка разбора записи {line_no + 1}: {e}. Импортировано: {imported}"
+        )
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Конфликт ID или key в порции после записи {imported}. Импортировано: {imported}"
+        )
+    finally:
+        # Уже закоммиченные порции должны попасть в индекс дедлайнов
+        if imported:
+            deadline_watcher.load(db)
+            if not completed:
+                # Клиентам об оборванном импорте не сообщается, но индексы других процессов
+                # должны увидеть закоммиченные порции
+                event_relay.publish({"type": "tasks_imported", "count": imported, "session_id": session_id})
+
+    logger.info(f"📥 Импорт завершён: {imported} задач (в архив {archived}), {chunks} транзакций, "
+                f"session={session_id}")
+
+    await manager.broadcast({
+        "type": "tasks_imported",
+        "count": imported,
+        "session_id": session_id
+    })
+    await board_summary.publish(session_id)
+
+    return {"imported": imported, "archived": archived, "chunks": chunks}
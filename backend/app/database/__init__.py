@@ -1,6 +1,8 @@
 """
 Database package
 """
-from .session import Base, engine, get_db, SessionLocal
+from .session import Base, get_engine, get_db, SessionLocal, create_engine_for, backend_name, is_sqlite
+from .types import JSONType
 
-__all__ = ['Base', 'engine', 'get_db', 'SessionLocal']
+__all__ = ['Base', 'get_engine', 'get_db', 'SessionLocal', 'create_engine_for', 'backend_name', 'is_sqlite',
+           'JSONType']
@@ -0,0 +1,128 @@
+"""
+Управление схемой БД через Alembic
+
+Схема меняется только явным шагом миграции:
+    python -m app.database.migrations
+
+При старте приложения выполняется лишь быстрая проверка версии схемы.
+"""
+from pathlib import Path
+from typing import Optional
+import logging
+import os
+import re
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from .session import DATABASE_URL, get_engine, normalize_url
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# Ревизия, соответствующая схеме, которую раньше создавал create_all
+BASELINE_REVISION = "0001"
+
+_REVISION_RE = re.compile(r"^revision\s*=\s*['\"]([^'\"]+)['\"]", re.MULTILINE)
+_DOWN_REVISION_RE = re.compile(r"^down_revision\s*=\s*['\"]([^'\"]+)['\"]", re.MULTILINE)
+
+# Автоматически применять миграции при старте (только для разработки)
+AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "false").lower() in ("1", "true", "yes")
+
+
+def _alembic_config():
+    from alembic.config import Config
+
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    # % в пароле экранируется - значения конфига Alembic проходят интерполяцию configparser
+    config.set_main_option("sqlalchemy.url", normalize_url(DATABASE_URL).replace("%", "%%"))
+    return config
+
+
+def head_revision() -> Optional[str]:
+    """
+    Последняя ревизия в migrations/versions
+
+    Файлы миграций разбираются регуляркой, без импорта Alembic:
+    проверка при старте не должна тянуть за собой весь движок миграций.
+    """
+    revisions = set()
+    parents = set()
+    for path in (BACKEND_DIR / "migrations" / "versions").glob("*.py"):
+        source = path.read_text(encoding="utf-8")
+        revision = _REVISION_RE.search(source)
+        if revision:
+            revisions.add(revision.group(1))
+        down_revision = _DOWN_REVISION_RE.search(source)
+        if down_revision:
+            parents.add(down_revision.group(1))
+
+    heads = revisions - parents
+    if len(heads) > 1:
+        raise RuntimeError(f"Несколько head ревизий миграций: {sorted(heads)}")
+    return next(iter(heads), None)
+
+
+def current_revision() -> Optional[str]:
+    """Ревизия схемы, записанная в БД (одна выборка из alembic_version)"""
+    try:
+        with get_engine().connect() as connection:
+            return connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except (OperationalError, ProgrammingError):
+        # Таблицы alembic_version нет - БД пустая или создана до Alembic
+        # (SQLite сообщает об этом OperationalError, PostgreSQL - ProgrammingError)
+        return None
+
+
+def upgrade_database():
+    """
+    Применить все миграции до head
+
+    БД, созданные до появления Alembic (через create_all), помечаются
+    базовой ревизией, после чего применяются остальные миграции.
+    """
+    from alembic import command
+
+    config = _alembic_config()
+
+    if current_revision() is None and inspect(get_engine()).has_table("tasks"):
+        logger.info(f"🗄️  Существующая БД без версии схемы - помечаем ревизией {BASELINE_REVISION}")
+        command.stamp(config, BASELINE_REVISION)
+
+    command.upgrade(config, "head")
+    logger.info(f"✅ Схема БД обновлена до ревизии {head_revision()}")
+
+
+def check_schema_version():
+    """
+    Быстрая проверка версии схемы при старте
+
+    Raises:
+        RuntimeError: Схема не совпадает с head и DB_AUTO_MIGRATE выключен
+    """
+    current = current_revision()
+    head = head_revision()
+    if current == head:
+        logger.info(f"🗄️  Схема БД актуальна: ревизия {current}")
+        return
+
+    if AUTO_MIGRATE:
+        logger.warning(f"🗄️  Схема БД устарела ({current} → {head}), DB_AUTO_MIGRATE включён")
+        upgrade_database()
+        return
+
+    raise RuntimeError(
+        f"Схема БД устарела: ревизия {current}, требуется {head}. "
+        f"Выполните 'python -m app.database.migrations' перед запуском"
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s | %(levelname)-8s | %(name)-20s | %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    upgrade_database()
@@ -0,0 +1,8 @@
+"""
+Типы колонок, зависящие от бэкенда БД
+"""
+from sqlalchemy import JSON
+from sqlalchemy.dialects.postgresql import JSONB
+
+# JSON в SQLite, JSONB в PostgreSQL (бинарное хранение, операторы @> / ? и GIN индексы)
+JSONType = JSON().with_variant(JSONB(), "postgresql")
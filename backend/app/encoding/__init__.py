@@ -0,0 +1,11 @@
+"""
+Encoding package: согласование кодировки ответов и сжатие
+"""
+from .codecs import (
+    JSON, JSON_COMPACT, MSGPACK, encode, decode, negotiate_subprotocol, msgpack_available
+)
+from .compression import CompressionMiddleware
+from .responses import EncodingMiddleware, NegotiatedResponse
+
+__all__ = ['JSON', 'JSON_COMPACT', 'MSGPACK', 'encode', 'decode', 'negotiate_subprotocol',
+           'msgpack_available', 'CompressionMiddleware', 'EncodingMiddleware', 'NegotiatedResponse']
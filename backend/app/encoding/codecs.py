@@ -0,0 +1,122 @@
+"""
+Кодировки ответов и WebSocket кадров
+
+- json: обычный JSON (по умолчанию)
+- json.compact: JSON без полей со значением null
+- msgpack: MessagePack без полей со значением null (если установлен msgpack)
+
+REST выбирает кодировку по заголовкам Accept / X-Compact, WebSocket -
+по подпротоколу (Sec-WebSocket-Protocol).
+"""
+from typing import Any, Iterable, List, Optional, Union
+import json
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - MessagePack опционален
+    msgpack = None
+
+JSON = "json"
+JSON_COMPACT = "json.compact"
+MSGPACK = "msgpack"
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPES = ("application/x-msgpack", "application/msgpack", "application/vnd.msgpack")
+
+# Заголовок, включающий компактный JSON для REST
+COMPACT_HEADER = "x-compact"
+
+# WebSocket подпротоколы в порядке предпочтения сервера
+SUBPROTOCOLS = (MSGPACK, JSON_COMPACT)
+
+
+def msgpack_available() -> bool:
+    return msgpack is not None
+
+
+def drop_nulls(value: Any) -> Any:
+    """Рекурсивно убрать ключи со значением None (списки сохраняют длину)"""
+    if isinstance(value, dict):
+        return {key: drop_nulls(item) for key, item in value.items() if item is not None}
+    if isinstance(value, list):
+        return [drop_nulls(item) for item in value]
+    return value
+
+
+def encode(message: Any, encoding: str = JSON) -> Union[str, bytes]:
+    """
+    Закодировать сообщение
+
+    Returns:
+        str для JSON кодировок (текстовый кадр), bytes для MessagePack
+    """
+    if encoding == JSON:
+        return json.dumps(message, ensure_ascii=False, separators=(",", ":"))
+    message = drop_nulls(message)
+    if encoding == MSGPACK:
+        return msgpack.packb(message, use_bin_type=True)
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":"))
+
+
+def decode(data: Union[str, bytes]) -> Any:
+    """Разобрать входящий WebSocket кадр (текст - JSON, бинарный - MessagePack)"""
+    if isinstance(data, bytes):
+        if msgpack is None:
+            raise ValueError("MessagePack не установлен")
+        return msgpack.unpackb(data, raw=False)
+    return json.loads(data)
+
+
+def _accepted_media_types(accept: str) -> List[str]:
+    """Медиатипы из Accept по убыванию q (при равном q - в порядке перечисления)"""
+    weighted = []
+    for part in accept.split(","):
+        media_type, *params = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            weighted.append((quality, media_type.lower()))
+    weighted.sort(key=lambda item: -item[0])
+    return [media_type for _, media_type in weighted]
+
+
+def negotiate_http(accept: Optional[str], compact: Optional[str]) -> str:
+    """
+    Выбрать кодировку REST ответа
+
+    Args:
+        accept: Значение заголовка Accept
+        compact: Значение заголовка X-Compact
+
+    Returns:
+        Одна из JSON / JSON_COMPACT / MSGPACK
+    """
+    if accept and msgpack is not None:
+        for media_type in _accepted_media_types(accept):
+            if media_type in MSGPACK_MEDIA_TYPES:
+                return MSGPACK
+            if media_type in (JSON_MEDIA_TYPE, "*/*", "application/*"):
+                break
+    if compact and compact.strip().lower() in ("1", "true", "yes"):
+        return JSON_COMPACT
+    return JSON
+
+
+def negotiate_subprotocol(offered: Iterable[str]) -> Optional[str]:
+    """
+    Выбрать WebSocket подпротокол из предложенных клиентом
+
+    Returns:
+        Имя подпротокола или None (обычный JSON без подпротокола)
+    """
+    offered = set(offered)
+    for subprotocol in SUBPROTOCOLS:
+        if subprotocol in offered and (subprotocol != MSGPACK or msgpack is not None):
+            return subprotocol
+    return None
@@ -0,0 +1,154 @@
+"""
+Сжатие REST ответов (brotli / gzip) по Accept-Encoding
+
+Ответы меньше COMPRESS_MIN_SIZE отправляются как есть. Потоковые ответы
+(экспорт) сжимаются по частям с flush после каждой части, чтобы клиент
+получал данные по мере генерации.
+"""
+from typing import List, Optional, Tuple
+import logging
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli опционален
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Минимальный размер тела для сжатия, байты
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+
+# Уровни сжатия: для динамических ответов важнее скорость, чем максимальная степень
+GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+
+BROTLI = "br"
+GZIP = "gzip"
+
+
+def _accepted_encodings(headers) -> List[str]:
+    for name, value in headers:
+        if name == b"accept-encoding":
+            accepted = []
+            for part in value.decode("latin-1").split(","):
+                coding, _, params = part.strip().partition(";")
+                if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                    continue
+                accepted.append(coding.strip().lower())
+            return accepted
+    return []
+
+
+def choose_encoding(headers) -> Optional[str]:
+    """Выбрать кодировку сжатия: brotli (если доступен), иначе gzip"""
+    accepted = _accepted_encodings(headers)
+    if brotli is not None and BROTLI in accepted:
+        return BROTLI
+    if GZIP in accepted or "*" in accepted:
+        return GZIP
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == BROTLI:
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            # wbits=31 - формат gzip (заголовок и CRC)
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, flush: bool) -> bytes:
+        """Сжать очередную часть; flush - отдать всё накопленное клиенту сейчас"""
+        if self.encoding == BROTLI:
+            return self._brotli.process(data) + (self._brotli.flush() if flush else b"")
+        return self._zlib.compress(data) + (self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else b"")
+
+    def finish(self) -> bytes:
+        if self.encoding == BROTLI:
+            return self._brotli.finish()
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+def _without(headers: List[Tuple[bytes, bytes]], *names: bytes) -> List[Tuple[bytes, bytes]]:
+    return [(name, value) for name, value in headers if name not in names]
+
+
+class CompressionMiddleware:
+    """ASGI middleware: сжатие ответов brotli / gzip выше порога размера"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(scope.get("headers", ()))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                headers = message.get("headers", [])
+                if any(name == b"content-encoding" for name, _ in headers):
+                    passthrough = True
+                    await send(message)
+                    return
+                # Заголовки отправляются вместе с первой частью тела, когда известен размер
+                start_message = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start_message is not None:
+                headers = list(start_message.get("headers", []))
+                headers.append((b"vary", b"Accept-Encoding"))
+
+                if not more_body and len(body) < COMPRESS_MIN_SIZE:
+                    # Маленький ответ целиком - сжатие не окупается
+                    passthrough = True
+                    await send({**start_message, "headers": headers})
+                    start_message = None
+                    await send(message)
+                    return
+
+                compressor = _Compressor(encoding)
+                headers = _without(headers, b"content-length")
+                headers.append((b"content-encoding", encoding.encode()))
+                if not more_body:
+                    body = compressor.compress(body, flush=False) + compressor.finish()
+                    headers.append((b"content-length", str(len(body)).encode()))
+                    await send({**start_message, "headers": headers})
+                    start_message = None
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send({**start_message, "headers": headers})
+                start_message = None
+
+            if more_body:
+                chunk = compressor.compress(body, flush=True)
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            else:
+                await send({
+                    "type": "http.response.body",
+                    "body": compressor.compress(body, flush=False) + compressor.finish(),
+                })
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,61 @@
+"""
+Ответы REST в согласованной кодировке
+
+EncodingMiddleware выбирает кодировку по заголовкам запроса и кладёт её
+в contextvar, NegotiatedResponse (класс ответа по умолчанию) кодирует
+содержимое в выбранную кодировку.
+"""
+from contextvars import ContextVar
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from .codecs import COMPACT_HEADER, JSON, JSON_COMPACT, MSGPACK, MSGPACK_MEDIA_TYPES, encode, negotiate_http
+
+_response_encoding: ContextVar[str] = ContextVar("response_encoding", default=JSON)
+
+
+class NegotiatedResponse(JSONResponse):
+    """JSON / компактный JSON / MessagePack в зависимости от заголовков запроса"""
+
+    def render(self, content: Any) -> bytes:
+        encoding = _response_encoding.get()
+        if encoding == JSON:
+            return super().render(content)
+        if encoding == MSGPACK:
+            self.media_type = MSGPACK_MEDIA_TYPES[0]
+            return encode(content, MSGPACK)
+        return encode(content, JSON_COMPACT).encode("utf-8")
+
+
+class EncodingMiddleware:
+    """ASGI middleware: согласование кодировки по Accept и X-Compact"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = compact = None
+        for name, value in scope.get("headers", ()):
+            if name == b"accept":
+                accept = value.decode("latin-1")
+            elif name == COMPACT_HEADER.encode():
+                compact = value.decode("latin-1")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                # Кэши и прокси должны различать ответы по этим заголовкам
+                headers = list(message.get("headers", []))
+                headers.append((b"vary", b"Accept, X-Compact"))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _response_encoding.set(negotiate_http(accept, compact))
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _response_encoding.reset(token)
@@ -1,13 +1,25 @@
 """
 Главное FastAPI приложение
 """
+import time
+
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from functools import partial
 import logging
 
-from .api import tasks
-from .websocket import manager
-from .database import Base, engine
+from .api import tasks, transfer, archive, history
+from .websocket import manager, event_relay
+from .database import SessionLocal, get_engine
+from .database.migrations import check_schema_version
+from .monitoring import (
+    cold_start, ColdStartMiddleware, MetricsMiddleware, ProfilingMiddleware, registry, observe_pool, metrics
+)
+from .services import deadline_watcher, board_summary, task_archiver, history_snapshotter
+from .encoding import CompressionMiddleware, EncodingMiddleware, NegotiatedResponse, decode
 
 # Настройка логирования
 logging.basicConfig(
@@ -18,16 +30,14 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-# Создание таблиц в БД
-logger.info("🗄️  Создание таблиц в базе данных...")
-Base.metadata.create_all(bind=engine)
-logger.info("✅ Таблицы созданы")
+cold_start.mark_import(_import_started)
 
 # Создание FastAPI приложения
 app = FastAPI(
     title="Todo Voice API",
     description="Backend API для Todo приложения с голосовым управлением",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=NegotiatedResponse
 )
 
 # CORS middleware для доступа с фронтенда
@@ -37,10 +47,40 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],  # Версия задачи для If-Match
 )
 
+# Кодировка ответов: JSON / компактный JSON / MessagePack (Accept, X-Compact)
+app.add_middleware(EncodingMiddleware)
+
+# Сжатие ответов brotli / gzip выше COMPRESS_MIN_SIZE
+app.add_middleware(CompressionMiddleware)
+
+# Профилирование по заголовку X-Profile или выборке PROFILE_SAMPLE_RATE
+app.add_middleware(ProfilingMiddleware)
+
+# Гистограммы длительности запросов по маршрутам (/metrics)
+app.add_middleware(MetricsMiddleware)
+
+# Замер холодного старта (импорт → первый запрос)
+app.add_middleware(ColdStartMiddleware)
+
+metrics.websocket_connections.set_function(lambda: len(manager.active_connections))
+metrics.websocket_broadcast_queue_depth.set_function(lambda: manager.queue_depth)
+metrics.deadlines_tracked.set_function(lambda: deadline_watcher.tracked_count)
+
+# События других воркеров: сначала индексы этого процесса, затем его WebSocket клиенты
+event_relay.subscribe(deadline_watcher.apply_event)
+event_relay.subscribe(board_summary.apply_event)
+event_relay.subscribe(partial(manager.broadcast, relay=False))
+event_relay.on_reload(deadline_watcher.reload)
+event_relay.on_reload(board_summary.reload)
+
 # Подключение роутеров
 app.include_router(tasks.router)
+app.include_router(transfer.router)
+app.include_router(archive.router)
+app.include_router(history.router)
 
 
 @app.get("/")
@@ -60,7 +100,13 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy"}
+    return {"status": "healthy", "cold_start": cold_start.as_dict()}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Метрики в текстовом формате Prometheus"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 @app.websocket("/ws")
@@ -75,12 +121,23 @@ async def websocket_endpoint(websocket: WebSocket):
     try:
         # Держим соединение открытым
         while True:
-            # Ждём сообщений от клиента (опционально)
-            data = await websocket.receive_text()
+            # Любое входящее сообщение продлевает жизнь соединения
+            # (текстовые кадры - JSON, бинарные - MessagePack)
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            data = frame.get("text") if frame.get("text") is not None else frame.get("bytes")
+            manager.touch(websocket)
             logger.debug(f"Получено от клиента: {data}")
 
-            # Можно обрабатывать входящие сообщения если нужно
-            # Например, ping/pong для keep-alive
+            # Клиентский keep-alive: {"type": "ping"} → {"type": "pong"}
+            # Ответы {"type": "pong"} на серверный ping достаточно отметить в touch
+            try:
+                message = decode(data)
+            except (ValueError, TypeError):
+                continue
+            if isinstance(message, dict) and message.get("type") == "ping":
+                await manager.send_personal({"type": "pong", "ts": message.get("ts")}, websocket)
 
     except WebSocketDisconnect:
         manager.disconnect(websocket)
@@ -93,10 +150,33 @@ async def websocket_endpoint(websocket: WebSocket):
 @app.on_event("startup")
 async def startup_event():
     """Действия при запуске приложения"""
+    # Схема меняется только явным шагом миграции - здесь лишь сверка версии
+    observe_pool(get_engine())
+    check_schema_version()
+
+    # LISTEN до загрузки индексов: изменения других воркеров после чтения не теряются
+    await event_relay.start()
+    db = SessionLocal()
+    try:
+        deadline_watcher.load(db)
+        board_summary.load(db)
+    finally:
+        db.close()
+    await deadline_watcher.start()
+    await manager.start()
+    await task_archiver.start()
+    await history_snapshotter.start()
+
+    cold_start.mark_startup()
     logger.info("🚀 Todo Voice API запущен")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Действия при остановке приложения"""
+    await history_snapshotter.stop()
+    await task_archiver.stop()
+    await manager.stop()
+    await event_relay.stop()
+    await deadline_watcher.stop()
     logger.info("🛑 Todo Voice API остановлен")
\ No newline at end of file
@@ -1,6 +1,10 @@
 """
 Models package
 """
-from .task import Task
+from .task import Task, TaskColumns, TASK_COLUMNS
+from .archive import ArchivedTask
+from .history import TaskChange, HistorySnapshot, TaskSnapshot
+from .summary import TaskSummaryCount
 
-__all__ = ['Task']
+__all__ = ['Task', 'TaskColumns', 'TASK_COLUMNS', 'ArchivedTask', 'TaskChange', 'HistorySnapshot', 'TaskSnapshot',
+           'TaskSummaryCount']
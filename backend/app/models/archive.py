@@ -0,0 +1,29 @@
+"""
+SQLAlchemy модель архива завершённых задач
+"""
+from sqlalchemy import Column, DateTime, Index
+from datetime import datetime
+
+from ..database.session import Base
+from .task import TaskColumns
+
+
+class ArchivedTask(TaskColumns, Base):
+    """
+    Завершённая задача, перенесённая из рабочей таблицы tasks
+
+    Колонки совпадают с Task (id и key сохраняются), дополнительно
+    хранится момент архивации.
+
+    Attributes:
+        archived_at: Когда задача перенесена в архив
+    """
+    __tablename__ = "tasks_archive"
+    __table_args__ = (
+        Index("ix_tasks_archive_completed_at", "completed_at"),
+    )
+
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<ArchivedTask(id={self.id}, key='{self.key}', completed_at='{self.completed_at}')>"
@@ -0,0 +1,83 @@
+"""
+SQLAlchemy модели истории изменений задач
+
+task_changes - журнал изменений (только добавление), пишется в той же
+транзакции, что и само изменение. history_snapshots / task_snapshots -
+периодические снимки состояния, ограничивающие длину воспроизведения
+журнала при восстановлении состояния на момент времени.
+"""
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from datetime import datetime
+
+from ..database.session import Base
+from ..database.types import JSONType
+
+
+class TaskChange(Base):
+    """
+    Запись журнала изменений задачи
+
+    Attributes:
+        task_id: ID задачи (без внешнего ключа - задача может быть удалена)
+        changed_at: Момент изменения (UTC)
+        action: created / updated / deleted / archived / restored
+        version: Версия задачи после изменения
+        session_id: Кто изменил (X-Session-ID клиента)
+        changes: created - все поля задачи, updated - {поле: стало},
+            restored - {"completed_at": стало}, deleted / archived - null
+    """
+    __tablename__ = "task_changes"
+    __table_args__ = (
+        Index("ix_task_changes_task_id_id", "task_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    task_id = Column(Integer, nullable=False)
+    changed_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    action = Column(String(20), nullable=False)
+    version = Column(Integer, nullable=True)
+    session_id = Column(String(100), nullable=True)
+    changes = Column(JSONType, nullable=True)
+
+    def __repr__(self):
+        return f"<TaskChange(id={self.id}, task_id={self.task_id}, action='{self.action}')>"
+
+
+class HistorySnapshot(Base):
+    """
+    Снимок состояния доски
+
+    Снимок хранит состояние только тех задач, которые изменились после
+    предыдущего снимка (первый снимок - все задачи), поэтому его размер
+    пропорционален числу изменений, а не размеру доски.
+
+    Attributes:
+        taken_at: Момент снимка (UTC)
+        last_change_id: Последняя запись журнала, учтённая в снимке
+    """
+    __tablename__ = "history_snapshots"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    taken_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    last_change_id = Column(Integer, nullable=False, default=0)
+    task_count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<HistorySnapshot(id={self.id}, taken_at='{self.taken_at}', last_change_id={self.last_change_id})>"
+
+
+class TaskSnapshot(Base):
+    """
+    Состояние задачи в снимке
+
+    Attributes:
+        data: Все поля задачи или null, если задача к моменту снимка удалена
+    """
+    __tablename__ = "task_snapshots"
+    __table_args__ = (
+        Index("ix_task_snapshots_task_id_snapshot_id", "task_id", "snapshot_id"),
+    )
+
+    snapshot_id = Column(Integer, ForeignKey("history_snapshots.id", ondelete="CASCADE"), primary_key=True)
+    task_id = Column(Integer, primary_key=True)
+    data = Column(JSONType, nullable=True)
@@ -0,0 +1,34 @@
+"""
+SQLAlchemy модель счётчиков сводки по доске
+
+Строки task_summary меняются не кодом приложения, а триггерами на tasks
+(миграция 0009) - в той же транзакции, что и сама задача: создание,
+изменение статуса / приоритета / исполнителя / спринта, удаление, перенос
+в архив, восстановление и импорт. Поэтому счётчики верны при любом числе
+воркеров и контейнеров.
+
+SQLite удаляет триггеры вместе с таблицей: миграция, пересоздающая tasks
+в batch режиме, должна создать триггеры сводки заново.
+"""
+from sqlalchemy import Column, Integer, String
+
+from ..database.session import Base
+
+
+class TaskSummaryCount(Base):
+    """
+    Счётчик задач в одной корзине сводки
+
+    Attributes:
+        dimension: Измерение: status / priority / assignee / sprint
+        bucket: Значение измерения строкой ("null" - значение не задано)
+        count: Количество задач в рабочей таблице (0 - корзина опустела)
+    """
+    __tablename__ = "task_summary"
+
+    dimension = Column(String(20), primary_key=True)
+    bucket = Column(String(100), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<TaskSummaryCount({self.dimension}={self.bucket}: {self.count})>"
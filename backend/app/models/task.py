@@ -1,13 +1,79 @@
 """
 SQLAlchemy модель для задач
 """
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, JSON, Date
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Date, Index
 from datetime import datetime
 
 from ..database.session import Base
+from ..database.types import JSONType
 
 
-class Task(Base):
+class TaskColumns:
+    """Колонки задачи - общие для рабочей таблицы tasks и архива tasks_archive"""
+
+    # 1.1. Идентификация и описание
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    key = Column(String(50), unique=True, index=True, nullable=True)  # TASK-123
+    title = Column(String(200), nullable=False)
+    description = Column(Text, nullable=True)
+    type = Column(String(50), nullable=True, default="Task")  # Task / Bug / Chore / Spike
+
+    # 1.2. Статус и жизненный цикл
+    status = Column(String(50), nullable=False, default="Backlog")  # Backlog / To Do / In Progress / Done
+    resolution = Column(String(50), nullable=True)  # Fixed / Won't Do / Duplicate / Done
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    completed_at = Column(DateTime, nullable=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    # 1.3. Ответственность и владение
+    assignee = Column(String(100), nullable=True)
+    reporter = Column(String(100), nullable=True)
+    watchers = Column(JSONType, nullable=True)  # Список наблюдателей
+
+    # 1.4. Приоритет и срочность
+    priority = Column(String(50), nullable=False, default="Medium")  # Lowest / Low / Medium / High / Critical
+    severity = Column(String(50), nullable=True)
+    due_date = Column(Date, nullable=True, index=True)
+    sla = Column(String(100), nullable=True)
+
+    # 1.5. Планирование и оценка
+    estimate = Column(String(50), nullable=True)  # time / story points
+    original_estimate = Column(String(50), nullable=True)
+    remaining_estimate = Column(String(50), nullable=True)
+    time_spent = Column(String(50), nullable=True)
+    start_date = Column(Date, nullable=True)
+
+    # 1.6. Связи и структура
+    project_id = Column(Integer, nullable=True)
+    parent_id = Column(Integer, nullable=True)
+    subtasks = Column(JSONType, nullable=True)  # Список ID подзадач
+    dependencies = Column(JSONType, nullable=True)  # {"blocked_by": [1, 2], "blocks": [3, 4]}
+    links = Column(JSONType, nullable=True)  # Список ID связанных задач
+
+    # 1.7. Классификация и группировка
+    labels = Column(JSONType, nullable=True)  # Список тегов
+    components = Column(JSONType, nullable=True)  # Список компонентов
+    epic_id = Column(Integer, nullable=True)
+    sprint_id = Column(Integer, nullable=True)
+    milestone = Column(String(100), nullable=True)
+
+    # 2. Контекст выполнения
+    location = Column(String(50), nullable=True)  # Дом / Работа / Любое
+    tools_required = Column(JSONType, nullable=True)  # Список инструментов
+    environment = Column(String(50), nullable=True)  # Тишина / Фон
+    connectivity = Column(String(50), nullable=True)  # Online / Offline
+    execution_mode = Column(String(50), nullable=True)  # Solo / Async / Sync
+
+    # 3. Рутинность и повторяемость
+    is_repeatable = Column(Boolean, nullable=False, default=False)
+    recurrence_rule = Column(String(100), nullable=True)  # Daily / Weekly / Cron
+    routine_type = Column(String(50), nullable=True)  # Routine / Ad-hoc
+    maintenance_level = Column(String(50), nullable=True)  # Core / Optional
+    skip_penalty = Column(Text, nullable=True)
+
+
+class Task(TaskColumns, Base):
     """
     Модель задачи - расширенная IT-трекер модель
 
@@ -25,6 +91,7 @@ class Task(Base):
         created_at: Дата создания
         updated_at: Последнее обновление
         completed_at: Дата завершения
+        version: Версия строки (растёт при каждом обновлении, используется в ETag / If-Match)
 
         # 1.3. Ответственность и владение
         assignee: Исполнитель
@@ -73,66 +140,23 @@ class Task(Base):
         skip_penalty: Что будет, если пропустить
     """
     __tablename__ = "tasks"
-
-    # 1.1. Идентификация и описание
-    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    key = Column(String(50), unique=True, index=True, nullable=True)  # TASK-123
-    title = Column(String(200), nullable=False)
-    description = Column(Text, nullable=True)
-    type = Column(String(50), nullable=True, default="Task")  # Task / Bug / Chore / Spike
-
-    # 1.2. Статус и жизненный цикл
-    status = Column(String(50), nullable=False, default="Backlog")  # Backlog / To Do / In Progress / Done
-    resolution = Column(String(50), nullable=True)  # Fixed / Won't Do / Duplicate / Done
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
-    completed_at = Column(DateTime, nullable=True)
-
-    # 1.3. Ответственность и владение
-    assignee = Column(String(100), nullable=True)
-    reporter = Column(String(100), nullable=True)
-    watchers = Column(JSON, nullable=True)  # Список наблюдателей
-
-    # 1.4. Приоритет и срочность
-    priority = Column(String(50), nullable=False, default="Medium")  # Lowest / Low / Medium / High / Critical
-    severity = Column(String(50), nullable=True)
-    due_date = Column(Date, nullable=True)
-    sla = Column(String(100), nullable=True)
-
-    # 1.5. Планирование и оценка
-    estimate = Column(String(50), nullable=True)  # time / story points
-    original_estimate = Column(String(50), nullable=True)
-    remaining_estimate = Column(String(50), nullable=True)
-    time_spent = Column(String(50), nullable=True)
-    start_date = Column(Date, nullable=True)
-
-    # 1.6. Связи и структура
-    project_id = Column(Integer, nullable=True)
-    parent_id = Column(Integer, nullable=True)
-    subtasks = Column(JSON, nullable=True)  # Список ID подзадач
-    dependencies = Column(JSON, nullable=True)  # {"blocked_by": [1, 2], "blocks": [3, 4]}
-    links = Column(JSON, nullable=True)  # Список ID связанных задач
-
-    # 1.7. Классификация и группировка
-    labels = Column(JSON, nullable=True)  # Список тегов
-    components = Column(JSON, nullable=True)  # Список компонентов
-    epic_id = Column(Integer, nullable=True)
-    sprint_id = Column(Integer, nullable=True)
-    milestone = Column(String(100), nullable=True)
-
-    # 2. Контекст выполнения
-    location = Column(String(50), nullable=True)  # Дом / Работа / Любое
-    tools_required = Column(JSON, nullable=True)  # Список инструментов
-    environment = Column(String(50), nullable=True)  # Тишина / Фон
-    connectivity = Column(String(50), nullable=True)  # Online / Offline
-    execution_mode = Column(String(50), nullable=True)  # Solo / Async / Sync
-
-    # 3. Рутинность и повторяемость
-    is_repeatable = Column(Boolean, nullable=False, default=False)
-    recurrence_rule = Column(String(100), nullable=True)  # Daily / Weekly / Cron
-    routine_type = Column(String(50), nullable=True)  # Routine / Ad-hoc
-    maintenance_level = Column(String(50), nullable=True)  # Core / Optional
-    skip_penalty = Column(Text, nullable=True)
+    __table_args__ = (
+        # Выборка архиватора: status = 'Done' AND completed_at < cutoff
+        Index("ix_tasks_status_completed_at", "status", "completed_at"),
+        # Подбор задач под контекст (GET /api/tasks/next)
+        Index("ix_tasks_context", "status", "location", "connectivity", "environment"),
+        # Поиск по содержимому JSON полей (labels @> '["work"]') - только PostgreSQL
+        *(
+            Index(f"ix_tasks_{column}_gin", column, postgresql_using="gin").ddl_if(dialect="postgresql")
+            for column in ("labels", "components", "tools_required", "dependencies")
+        ),
+        # SQLite без AUTOINCREMENT отдаёт ID удалённой или заархивированной задачи заново
+        {"sqlite_autoincrement": True},
+    )
 
     def __repr__(self):
         return f"<Task(id={self.id}, key='{self.key}', priority='{self.priority}', title='{self.title}')>"
+
+
+# Колонки, общие для tasks и tasks_archive
+TASK_COLUMNS = [column.name for column in Task.__table__.columns]
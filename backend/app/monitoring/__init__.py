@@ -0,0 +1,10 @@
+"""
+Monitoring package
+"""
+from .coldstart import cold_start, ColdStartMiddleware
+from .metrics import registry, MetricsMiddleware, observe_pool
+from .profiling import ProfilingMiddleware, profile_section
+from . import metrics
+
+__all__ = ['cold_start', 'ColdStartMiddleware', 'registry', 'MetricsMiddleware', 'observe_pool',
+           'ProfilingMiddleware', 'profile_section', 'metrics']
@@ -0,0 +1,70 @@
+"""
+Замер холодного старта: от импорта приложения до первого обслуженного запроса
+"""
+from typing import Optional
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Бюджет холодного старта (импорт → первый запрос), мс
+COLD_START_BUDGET_MS = float(os.getenv("COLD_START_BUDGET_MS", "1500"))
+
+
+class ColdStart:
+    """
+    Отметки времени холодного старта
+
+    Attributes:
+        import_started: Начало импорта app.main (perf_counter)
+        startup_ms: Импорт → завершение startup
+        first_request_ms: Импорт → первый обслуженный запрос
+    """
+
+    def __init__(self):
+        self.import_started: float = time.perf_counter()
+        self.startup_ms: Optional[float] = None
+        self.first_request_ms: Optional[float] = None
+
+    def mark_import(self, started: float):
+        """Зафиксировать начало импорта приложения"""
+        self.import_started = started
+
+    def mark_startup(self):
+        """Зафиксировать окончание startup"""
+        self.startup_ms = (time.perf_counter() - self.import_started) * 1000
+        logger.info(f"⏱️  Старт: импорт → startup за {self.startup_ms:.0f} мс")
+
+    def mark_first_request(self):
+        """Зафиксировать первый обслуженный запрос и сверить с бюджетом"""
+        self.first_request_ms = (time.perf_counter() - self.import_started) * 1000
+        if self.first_request_ms > COLD_START_BUDGET_MS:
+            logger.warning(
+                f"⏱️  Холодный старт {self.first_request_ms:.0f} мс превышает бюджет {COLD_START_BUDGET_MS:.0f} мс"
+            )
+        else:
+            logger.info(f"⏱️  Холодный старт: импорт → первый запрос за {self.first_request_ms:.0f} мс")
+
+    def as_dict(self) -> dict:
+        return {
+            "startup_ms": self.startup_ms,
+            "first_request_ms": self.first_request_ms,
+            "budget_ms": COLD_START_BUDGET_MS,
+        }
+
+
+class ColdStartMiddleware:
+    """ASGI middleware, отмечающий завершение первого HTTP запроса"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        await self.app(scope, receive, send)
+        if scope["type"] == "http" and cold_start.first_request_ms is None:
+            cold_start.mark_first_request()
+
+
+# Глобальные отметки холодного старта
+cold_start = ColdStart()
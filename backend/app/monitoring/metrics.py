@@ -0,0 +1,301 @@
+"""
+Метрики приложения в текстовом формате Prometheus
+
+Небольшая встроенная реализация Counter / Gauge / Histogram без внешних
+зависимостей. Метрики отдаются на GET /metrics.
+"""
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .profiling import record_query
+
+# Бакеты по умолчанию (как в клиентских библиотеках Prometheus), секунды
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Бакеты для SQL запросов - они заметно короче HTTP запросов
+QUERY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric:
+    """Базовый класс метрики"""
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Монотонно растущий счётчик"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, *labels: str):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}" for labels, value in items]
+
+
+class Gauge(Metric):
+    """Значение, которое может расти и убывать; опционально вычисляется при сборе"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, *labels: str):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, amount: float = 1.0, *labels: str):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, *labels: str):
+        self.inc(-amount, *labels)
+
+    def set_function(self, function: Callable[[], float]):
+        """Вычислять значение в момент сбора метрик"""
+        self._function = function
+
+    def _samples(self) -> List[str]:
+        if self._function is not None:
+            try:
+                value = self._function()
+            except Exception:
+                return []
+            if value is None:
+                return []
+            return [f"{self.name} {_format_value(value)}"]
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}" for labels, value in items]
+
+
+class Histogram(Metric):
+    """Гистограмма с фиксированными бакетами"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [counts по бакетам (+Inf последний), sum]
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = ([0] * (len(self.buckets) + 1), [0.0])
+                self._values[labels] = state
+            state[0][index] += 1
+            state[1][0] += value
+
+    def time(self, *labels: str) -> "_Timer":
+        """Контекстный менеджер для замера длительности блока"""
+        return _Timer(self, labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(labels, list(counts), total[0]) for labels, (counts, total) in self._values.items()]
+
+        lines = []
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: LabelValues):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+
+
+class Registry:
+    """Набор метрик, отдаваемых на /metrics"""
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Глобальный реестр метрик
+registry = Registry()
+
+# HTTP
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Длительность HTTP запросов по маршрутам",
+    ("method", "route", "status")
+))
+
+# БД
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "Длительность SQL запросов по типу операции",
+    ("operation",), buckets=QUERY_BUCKETS
+))
+db_pool_size = registry.register(Gauge("db_pool_size", "Размер пула соединений БД"))
+db_pool_checked_out = registry.register(Gauge("db_pool_checked_out", "Соединений БД выдано из пула"))
+db_pool_overflow = registry.register(Gauge("db_pool_overflow", "Соединений БД сверх размера пула"))
+
+# WebSocket
+websocket_connections = registry.register(Gauge("websocket_connections", "Активные WebSocket соединения"))
+websocket_broadcast_duration = registry.register(Histogram(
+    "websocket_broadcast_duration_seconds", "Длительность рассылки одного события всем клиентам",
+    ("type",)
+))
+websocket_broadcast_queue_depth = registry.register(Gauge(
+    "websocket_broadcast_queue_depth", "События, ожидающие отправки (очередь рассылки и окно слияния)"
+))
+websocket_send_errors = registry.register(Counter(
+    "websocket_send_errors_total", "Ошибки отправки WebSocket сообщений"
+))
+websocket_coalesced_events = registry.register(Counter(
+    "websocket_coalesced_events_total", "События, поглощённые слиянием в окне WS_COALESCE_MS"
+))
+websocket_reaped = registry.register(Counter(
+    "websocket_reaped_total", "WebSocket соединения, закрытые по таймауту heartbeat"
+))
+event_relay_messages = registry.register(Counter(
+    "event_relay_messages_total", "События, переданные другим процессам и полученные от них (LISTEN / NOTIFY)",
+    ("direction",)
+))
+
+# Дедлайны
+deadlines_tracked = registry.register(Gauge("deadlines_tracked", "Дедлайны в индексе deadline watcher"))
+
+# Архив
+tasks_archived = registry.register(Counter("tasks_archived_total", "Задачи, перенесённые в архив"))
+
+
+def _operation(statement: str) -> str:
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return keyword if keyword in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    db_query_duration.observe(elapsed, _operation(statement))
+    record_query(cursor, statement, parameters, executemany, elapsed)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # after_cursor_execute не вызывается при ошибке - снимаем отметку старта
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+def observe_pool(engine: Engine):
+    """Отдавать статистику пула соединений engine"""
+    pool = engine.pool
+    if hasattr(pool, "size"):
+        db_pool_size.set_function(pool.size)
+    if hasattr(pool, "checkedout"):
+        db_pool_checked_out.set_function(pool.checkedout)
+    if hasattr(pool, "overflow"):
+        # QueuePool считает overflow от -pool_size, пока пул не заполнен
+        db_pool_overflow.set_function(lambda: max(pool.overflow(), 0))
+
+
+class MetricsMiddleware:
+    """ASGI middleware: гистограмма длительности HTTP запросов по шаблону маршрута"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Шаблон маршрута (/api/tasks/{task_id}/), а не конкретный путь - иначе взрыв кардинальности
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            http_request_duration.observe(
+                time.perf_counter() - started, scope["method"], route, str(status_code)
+            )
@@ -0,0 +1,284 @@
+"""
+Профилирование запросов по требованию и лог медленных SQL запросов
+
+Профиль включается заголовком X-Profile: 1 или случайной выборкой
+(PROFILE_SAMPLE_RATE). Для профилируемого запроса собирается разбивка времени:
+БД, сериализация, рассылка WebSocket. Она отдаётся в заголовке Server-Timing
+и пишется в лог. Для выбросов (дольше PROFILE_OUTLIER_MS) в лог пишутся
+самые частые стеки из сэмплера.
+
+Без профиля накладные расходы - одна проверка contextvar на секцию.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+import logging
+import os
+import random
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Доля запросов, профилируемых без заголовка (0 - только по заголовку)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+
+# Заголовок, включающий профиль для конкретного запроса
+PROFILE_HEADER = b"x-profile"
+
+# Порог выброса, после которого в лог пишутся стеки, мс
+PROFILE_OUTLIER_MS = float(os.getenv("PROFILE_OUTLIER_MS", "500"))
+
+# Интервал сэмплирования стеков, мс (0 - сэмплер выключен)
+PROFILE_STACK_INTERVAL_MS = float(os.getenv("PROFILE_STACK_INTERVAL_MS", "5"))
+
+# Порог медленного SQL запроса, мс (0 - лог выключен)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "250"))
+
+# Сколько самых частых стеков выводить для выброса
+TOP_STACKS = 5
+
+# Сколько внутренних кадров стека сохранять (внешние - цикл событий и middleware)
+STACK_DEPTH = 15
+
+# Запросы, для которых строится план (EXPLAIN поддерживается только для них)
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+# Savepoint, в котором выполняется EXPLAIN на PostgreSQL
+EXPLAIN_SAVEPOINT = "profiling_explain"
+
+
+class RequestProfile:
+    """
+    Разбивка времени одного запроса
+
+    Attributes:
+        sections: Суммарное время по секциям (db / serialization / broadcast), секунды
+        queries: Количество SQL запросов
+        stacks: Частоты сэмплированных стеков
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sections: Dict[str, float] = {}
+        self.queries = 0
+        self.stacks: Counter = Counter()
+
+    def add(self, section: str, elapsed: float):
+        self.sections[section] = self.sections.get(section, 0.0) + elapsed
+
+    @property
+    def total(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total: float) -> str:
+        """Значение заголовка Server-Timing"""
+        parts = [f'db;desc="{self.queries} queries";dur={self.sections.get("db", 0.0) * 1000:.2f}']
+        for section in ("serialization", "broadcast"):
+            parts.append(f"{section};dur={self.sections.get(section, 0.0) * 1000:.2f}")
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+
+def current_profile() -> Optional[RequestProfile]:
+    """Профиль текущего запроса (None, если профилирование выключено)"""
+    return _current_profile.get()
+
+
+@contextmanager
+def profile_section(section: str):
+    """
+    Засечь время блока в секции профиля
+
+    Args:
+        section: Имя секции (serialization / broadcast)
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(section, time.perf_counter() - started)
+
+
+def record_query(cursor, statement: str, parameters, executemany: bool, elapsed: float):
+    """
+    Учесть выполненный SQL запрос (вызывается из событий engine)
+
+    Добавляет время в секцию db профиля и пишет медленные запросы в лог
+    вместе с планом выполнения.
+    """
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.add("db", elapsed)
+        profile.queries += 1
+
+    if SLOW_QUERY_MS and elapsed * 1000 > SLOW_QUERY_MS:
+        logger.warning(
+            f"🐢 Медленный SQL ({elapsed * 1000:.1f} мс): {statement.strip()}\n"
+            f"{_explain(cursor, statement, parameters, executemany)}"
+        )
+
+
+def _explain(cursor, statement: str, parameters, executemany: bool) -> str:
+    """
+    План выполнения запроса на соединении самого запроса
+
+    На PostgreSQL ошибка в транзакции делает её непригодной до ROLLBACK,
+    поэтому EXPLAIN выполняется внутри SAVEPOINT и при ошибке откатывается
+    только он - транзакция запроса продолжается как ни в чём не бывало.
+    """
+    if executemany:
+        return "   (план не строится для executemany)"
+    if not statement.lstrip().upper().startswith(EXPLAINABLE):
+        return "   (план не строится для этого запроса)"
+    connection = getattr(cursor, "connection", None)
+    if connection is None:
+        return "   (план недоступен)"
+
+    sqlite = type(connection).__module__.startswith("sqlite3")
+    prefix = "EXPLAIN QUERY PLAN " if sqlite else "EXPLAIN "
+    explain_cursor = connection.cursor()
+    try:
+        if not sqlite:
+            explain_cursor.execute(f"SAVEPOINT {EXPLAIN_SAVEPOINT}")
+        try:
+            explain_cursor.execute(prefix + statement, parameters or ())
+            rows = explain_cursor.fetchall()
+        except Exception as e:
+            if not sqlite:
+                explain_cursor.execute(f"ROLLBACK TO SAVEPOINT {EXPLAIN_SAVEPOINT}")
+                explain_cursor.execute(f"RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}")
+            return f"   (не удалось получить план: {e})"
+        if not sqlite:
+            explain_cursor.execute(f"RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}")
+    except Exception as e:
+        return f"   (не удалось получить план: {e})"
+    finally:
+        explain_cursor.close()
+    return "\n".join(f"   {' | '.join(str(value) for value in row)}" for row in rows)
+
+
+class _StackSampler:
+    """
+    Общий фоновый поток, периодически снимающий стеки профилируемых запросов
+
+    Поток один на процесс и запускается при первой регистрации; пока
+    профилируемых запросов нет, он спит на условии. Стек каждого потока
+    снимается один раз за проход и засчитывается всем его запросам.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        # Профиль → ID потока, обрабатывающего запрос
+        self._profiles: Dict[RequestProfile, int] = {}
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, profile: RequestProfile, thread_id: int):
+        with self._condition:
+            self._profiles[profile] = thread_id
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def unregister(self, profile: RequestProfile):
+        """Снять профиль с сэмплирования (после возврата стеки в нём не меняются)"""
+        with self._condition:
+            self._profiles.pop(profile, None)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._profiles:
+                    self._condition.wait()
+                thread_ids = set(self._profiles.values())
+
+            frames = sys._current_frames()
+            stacks = {thread_id: self._format(frames.get(thread_id)) for thread_id in thread_ids}
+            del frames
+
+            with self._condition:
+                for profile, thread_id in self._profiles.items():
+                    stack = stacks.get(thread_id)
+                    if stack:
+                        profile.stacks[stack] += 1
+            time.sleep(self.interval)
+
+    @staticmethod
+    def _format(frame) -> Optional[str]:
+        stack = []
+        while frame is not None and len(stack) < STACK_DEPTH:
+            code = frame.f_code
+            stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+            frame = frame.f_back
+        return ";".join(reversed(stack)) if stack else None
+
+
+# Общий сэмплер стеков (None - сэмплирование выключено)
+_sampler = _StackSampler(PROFILE_STACK_INTERVAL_MS / 1000) if PROFILE_STACK_INTERVAL_MS > 0 else None
+
+
+def _should_profile(scope) -> bool:
+    for name, value in scope.get("headers", ()):
+        if name == PROFILE_HEADER:
+            return value not in (b"0", b"false", b"")
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+class ProfilingMiddleware:
+    """ASGI middleware, включающий профиль для выбранных запросов"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+
+        if _sampler is not None:
+            _sampler.register(profile, threading.get_ident())
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", profile.server_timing(profile.total).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            total = profile.total
+            if _sampler is not None:
+                _sampler.unregister(profile)
+            _current_profile.reset(token)
+            self._report(scope, profile, total)
+
+    @staticmethod
+    def _report(scope, profile: RequestProfile, total: float):
+        sections = ", ".join(f"{name}={value * 1000:.1f}мс" for name, value in sorted(profile.sections.items()))
+        logger.info(
+            f"🔬 Профиль {scope['method']} {scope['path']}: total={total * 1000:.1f}мс, "
+            f"queries={profile.queries}, {sections or 'секций нет'}"
+        )
+        if total * 1000 > PROFILE_OUTLIER_MS and profile.stacks:
+            samples = sum(profile.stacks.values())
+            lines = [
+                f"   {count}/{samples}: {stack}"
+                for stack, count in profile.stacks.most_common(TOP_STACKS)
+            ]
+            logger.warning(f"🔬 Выброс {scope['path']} ({total * 1000:.0f} мс), частые стеки:\n" + "\n".join(lines))
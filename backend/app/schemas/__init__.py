@@ -1,6 +1,10 @@
 """
 Schemas package
 """
-from .task import TaskBase, TaskCreate, TaskUpdate, TaskResponse
+from .task import (
+    TaskBase, TaskCreate, TaskUpdate, TaskResponse, ArchivedTaskResponse, TaskExport, TaskImport, DueTaskResponse,
+    TaskSummaryResponse, NextTaskResponse, TaskChangeResponse
+)
 
-__all__ = ['TaskBase', 'TaskCreate', 'TaskUpdate', 'TaskResponse']
+__all__ = ['TaskBase', 'TaskCreate', 'TaskUpdate', 'TaskResponse', 'ArchivedTaskResponse', 'TaskExport', 'TaskImport',
+           'DueTaskResponse', 'TaskSummaryResponse', 'NextTaskResponse', 'TaskChangeResponse']
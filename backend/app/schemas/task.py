@@ -132,6 +132,7 @@ class TaskResponse(TaskBase):
     created_at: datetime
     updated_at: datetime
     completed_at: Optional[datetime] = None
+    version: int = 1
 
     # 1.3. Ответственность и владение
     assignee: Optional[str] = None
@@ -140,3 +141,72 @@ class TaskResponse(TaskBase):
 
     class Config:
         from_attributes = True  # Для работы с ORM моделями
+
+
+class ArchivedTaskResponse(TaskResponse):
+    """Схема архивной задачи"""
+    archived_at: datetime
+
+
+class TaskExport(TaskResponse):
+    """Схема строки экспорта: archived_at задан только у задач из архива"""
+    archived_at: Optional[datetime] = None
+
+
+class TaskImport(TaskBase):
+    """Схема строки импорта (служебные поля сохраняются, если переданы; с archived_at - в архив)"""
+    id: Optional[int] = None
+    key: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    archived_at: Optional[datetime] = None
+    version: Optional[int] = None
+
+    # 1.3. Ответственность и владение
+    assignee: Optional[str] = None
+    reporter: Optional[str] = None
+    watchers: Optional[List[str]] = None
+
+
+class DueTaskResponse(BaseModel):
+    """Схема задачи с наступающим дедлайном"""
+    kind: str = Field(..., description="Вид дедлайна: due / sla")
+    deadline: datetime = Field(..., description="Момент наступления дедлайна (UTC)")
+    overdue: bool = Field(..., description="Дедлайн уже наступил")
+    task: TaskResponse
+
+
+class NextTaskResponse(BaseModel):
+    """Схема задачи, подобранной под текущий контекст"""
+    score: int = Field(..., description="Балл ранжирования")
+    reasons: List[str] = Field(default_factory=list, description="Почему задача в выдаче")
+    task: TaskResponse
+
+
+class TaskSummaryResponse(BaseModel):
+    """Схема сводки по доске (ключ "null" - пустое значение)"""
+    total: int = Field(..., description="Всего задач")
+    by_status: Dict[str, int] = Field(default_factory=dict, description="Количество задач по статусу")
+    by_priority: Dict[str, int] = Field(default_factory=dict, description="Количество задач по приоритету")
+    by_assignee: Dict[str, int] = Field(default_factory=dict, description="Количество задач по исполнителю")
+    by_sprint: Dict[str, int] = Field(default_factory=dict, description="Количество задач по спринту")
+
+
+class TaskChangeResponse(BaseModel):
+    """Схема записи журнала изменений задачи"""
+    id: int
+    task_id: int
+    changed_at: datetime = Field(..., description="Момент изменения (UTC)")
+    action: str = Field(..., description="created / updated / deleted / archived / restored")
+    version: Optional[int] = Field(None, description="Версия задачи после изменения")
+    session_id: Optional[str] = Field(None, description="Кто изменил (X-Session-ID)")
+    changes: Optional[Dict[str, Any]] = Field(
+        None, description="created - все поля, updated - {поле: стало}, deleted - null"
+    )
+    previous: Optional[Dict[str, Any]] = Field(
+        None, description="updated - {поле: было} (восстанавливается по журналу; null, если неизвестно)"
+    )
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,18 @@
+"""
+Services package
+"""
+from .deadlines import deadline_watcher, DeadlineWatcher, parse_duration, DONE_STATUS
+from .summary import board_summary, BoardSummary
+from .archive import task_archiver, TaskArchiver, restore_task
+from .next_tasks import find_next_tasks
+from .history import (
+    history_snapshotter, HistorySnapshotter, take_snapshot, task_as_of, board_as_of, task_changes,
+    record_created, record_updated, record_deleted, record_imported,
+    record_archived, record_restored
+)
+
+__all__ = ['deadline_watcher', 'DeadlineWatcher', 'parse_duration', 'DONE_STATUS',
+           'board_summary', 'BoardSummary', 'task_archiver', 'TaskArchiver', 'restore_task',
+           'find_next_tasks', 'history_snapshotter', 'HistorySnapshotter', 'take_snapshot', 'task_as_of',
+           'board_as_of', 'task_changes', 'record_created', 'record_updated',
+           'record_deleted', 'record_imported', 'record_archived', 'record_restored']
@@ -0,0 +1,197 @@
+"""
+Task Archiver
+Переносит завершённые задачи старше ARCHIVE_AFTER_DAYS из рабочей таблицы
+tasks в tasks_archive фоновыми порциями, чтобы рабочий набор оставался
+небольшим независимо от истории.
+"""
+from datetime import datetime, timedelta
+from typing import List, Optional
+import asyncio
+import logging
+import os
+
+from sqlalchemy import DateTime, case, delete, insert, literal, select
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models import Task, ArchivedTask, TASK_COLUMNS
+from ..monitoring import metrics
+from ..websocket import manager
+from .deadlines import DONE_STATUS, deadline_watcher
+from .history import record_archived, record_restored
+from .summary import board_summary
+
+logger = logging.getLogger(__name__)
+
+# Через сколько дней после завершения задача уходит в архив (0 - архивация выключена)
+ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+
+# Размер порции: одна порция - одна короткая транзакция
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+
+# Интервал между проходами архиватора, секунды
+ARCHIVE_INTERVAL = float(os.getenv("ARCHIVE_INTERVAL", "3600"))
+
+def archive_batch(db: Session, cutoff: datetime, limit: int = ARCHIVE_BATCH_SIZE) -> List[int]:
+    """
+    Перенести в архив одну порцию завершённых задач
+
+    Копирование и удаление выполняются в одной транзакции; условие
+    повторяется в обоих запросах, поэтому задача, переоткрытая между
+    выборкой и переносом, остаётся в рабочей таблице. Перенос пишется
+    в журнал изменений в той же транзакции.
+
+    Args:
+        db: Сессия БД
+        cutoff: Архивируются задачи, завершённые раньше этого момента
+        limit: Размер порции
+
+    Returns:
+        List[int]: ID перенесённых задач
+    """
+    # Строки порции блокируются до commit: архиватор другого воркера их пропускает,
+    # а не пытается перенести те же задачи второй раз (на SQLite - без изменений)
+    candidates = db.scalars(
+        select(Task.id)
+        .where(Task.status == DONE_STATUS, Task.completed_at < cutoff)
+        .order_by(Task.completed_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not candidates:
+        return []
+
+    condition = (Task.id.in_(candidates), Task.status == DONE_STATUS, Task.completed_at < cutoff)
+    db.execute(
+        insert(ArchivedTask).from_select(
+            [*TASK_COLUMNS, "archived_at"],
+            select(*Task.__table__.columns, literal(datetime.utcnow(), DateTime())).where(*condition)
+        )
+    )
+    moved = db.execute(delete(Task).where(*condition).returning(Task.id, Task.version)).all()
+    record_archived(db, moved)
+    db.commit()
+    return [row.id for row in moved]
+
+
+def restore_task(db: Session, task_id: int, session_id: Optional[str] = None) -> Optional[Task]:
+    """
+    Вернуть задачу из архива в рабочую таблицу (без commit)
+
+    Вызывающий код коммитит восстановление вместе со своим изменением,
+    например с обновлением задачи. У задачи в статусе Done момент
+    завершения становится текущим - иначе следующий проход архиватора
+    сразу вернул бы её в архив. Версия не меняется.
+
+    Args:
+        db: Сессия БД
+        task_id: ID задачи
+        session_id: Кто восстановил (для журнала изменений)
+
+    Returns:
+        Task или None, если в архиве такой задачи нет
+    """
+    archive = ArchivedTask.__table__
+    completed_at = case(
+        (archive.c.status == DONE_STATUS, literal(datetime.utcnow(), DateTime())),
+        else_=archive.c.completed_at,
+    )
+    restored = db.execute(
+        insert(Task).from_select(
+            TASK_COLUMNS,
+            select(*(
+                completed_at if name == "completed_at" else archive.c[name]
+                for name in TASK_COLUMNS
+            )).where(archive.c.id == task_id)
+        ).returning(Task.version, Task.completed_at)
+    ).first()
+    if restored is None:
+        return None
+    db.execute(delete(ArchivedTask).where(ArchivedTask.id == task_id))
+    record_restored(db, task_id, restored.version, restored.completed_at, session_id)
+    logger.info(f"📤 Задача восстановлена из архива: ID={task_id}")
+    return db.get(Task, task_id)
+
+
+class TaskArchiver:
+    """
+    Фоновый архиватор завершённых задач
+
+    Порции переносятся в отдельном потоке, чтобы не блокировать цикл
+    событий; между порциями обновляются сводка по доске и клиенты.
+    """
+
+    def __init__(self):
+        self._runner: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> int:
+        """
+        Один проход: переносить порции, пока есть подходящие задачи
+
+        Returns:
+            int: Сколько задач перенесено
+        """
+        cutoff = datetime.utcnow() - timedelta(days=ARCHIVE_AFTER_DAYS)
+        total = 0
+        while True:
+            moved = await asyncio.to_thread(self._archive_batch, cutoff)
+            if moved:
+                total += len(moved)
+                await self._publish(moved)
+            if len(moved) < ARCHIVE_BATCH_SIZE:
+                break
+
+        if total:
+            logger.info(f"🗄️  В архив перенесено задач: {total} (завершены до {cutoff.isoformat()})")
+        return total
+
+    @staticmethod
+    def _archive_batch(cutoff: datetime) -> List[int]:
+        db = SessionLocal()
+        try:
+            return archive_batch(db, cutoff)
+        finally:
+            db.close()
+
+    @staticmethod
+    async def _publish(task_ids: List[int]):
+        metrics.tasks_archived.inc(len(task_ids))
+        for task_id in task_ids:
+            deadline_watcher.untrack(task_id)
+        await manager.broadcast({
+            "type": "tasks_archived",
+            "task_ids": task_ids,
+        })
+        await board_summary.publish()
+
+    async def start(self):
+        """Запустить фоновый цикл"""
+        if self._runner is not None or ARCHIVE_AFTER_DAYS <= 0:
+            return
+        self._runner = asyncio.create_task(self._run())
+        logger.info(f"🗄️  Архиватор запущен: задачи старше {ARCHIVE_AFTER_DAYS:g} дн., "
+                    f"порции по {ARCHIVE_BATCH_SIZE}")
+
+    async def stop(self):
+        """Остановить фоновый цикл"""
+        if self._runner is None:
+            return
+        self._runner.cancel()
+        try:
+            await self._runner
+        except asyncio.CancelledError:
+            pass
+        self._runner = None
+        logger.info("🗄️  Архиватор остановлен")
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Ошибка архивации задач: {e}")
+            await asyncio.sleep(ARCHIVE_INTERVAL)
+
+
+# Глобальный экземпляр архиватора
+task_archiver = TaskArchiver()
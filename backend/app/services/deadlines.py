@@ -0,0 +1,293 @@
+"""
+Deadline Watcher
+Следит за дедлайнами (due_date) и SLA задач и рассылает события о просрочке
+"""
+from datetime import datetime, date, time, timedelta
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import heapq
+import logging
+import re
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models import Task
+from ..schemas import TaskResponse
+from ..websocket import manager
+
+logger = logging.getLogger(__name__)
+
+# Статус, при котором дедлайны задачи больше не отслеживаются
+DONE_STATUS = "Done"
+
+# Виды дедлайнов и соответствующие им WebSocket события
+KIND_DUE = "due"
+KIND_SLA = "sla"
+EVENT_TYPES = {
+    KIND_DUE: "task_overdue",
+    KIND_SLA: "sla_breach",
+}
+
+# Максимальный сон между проверками (защита от дрейфа часов)
+MAX_SLEEP_SECONDS = 3600
+
+_DURATION_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([mhdw]?)\s*$", re.IGNORECASE)
+_DURATION_UNITS = {
+    "m": timedelta(minutes=1),
+    "h": timedelta(hours=1),
+    "d": timedelta(days=1),
+    "w": timedelta(weeks=1),
+}
+
+
+def parse_duration(value: Optional[str]) -> Optional[timedelta]:
+    """
+    Разобрать длительность вида 30m / 4h / 2d / 1w
+
+    Число без единицы трактуется как часы (SLA обычно задаётся в часах).
+
+    Returns:
+        timedelta или None, если строку разобрать не удалось
+    """
+    if not value:
+        return None
+    match = _DURATION_RE.match(value)
+    if not match:
+        return None
+    amount, unit = match.groups()
+    return float(amount) * _DURATION_UNITS[(unit or "h").lower()]
+
+
+def compute_deadlines(task: Task) -> Dict[str, datetime]:
+    """
+    Посчитать дедлайны задачи
+
+    - due: задача просрочена, когда закончился день due_date
+    - sla: created_at + длительность из поля sla
+    """
+    deadlines: Dict[str, datetime] = {}
+    if task.status == DONE_STATUS:
+        return deadlines
+
+    if isinstance(task.due_date, date):
+        deadlines[KIND_DUE] = datetime.combine(task.due_date + timedelta(days=1), time.min)
+
+    sla = parse_duration(task.sla)
+    if sla is not None and task.created_at is not None:
+        deadlines[KIND_SLA] = task.created_at + sla
+
+    return deadlines
+
+
+class DeadlineWatcher:
+    """
+    Фоновый сервис дедлайнов
+
+    Отвечает за:
+    - Индекс предстоящих дедлайнов (heap по времени) только для открытых задач
+    - Рассылку task_overdue / sla_breach в момент наступления дедлайна
+    - Быстрые выборки "что истекает в ближайшее время"
+
+    Стоимость операций зависит от числа отслеживаемых дедлайнов,
+    а не от размера таблицы задач.
+    """
+
+    def __init__(self):
+        # Очередь (deadline, task_id, kind); устаревшие записи отбрасываются лениво
+        self._heap: List[Tuple[datetime, int, str]] = []
+        # Актуальные дедлайны: task_id -> {kind: deadline}
+        self._deadlines: Dict[int, Dict[str, datetime]] = {}
+        # Краткие данные задачи для событий: task_id -> (key, title)
+        self._meta: Dict[int, Tuple[Optional[str], str]] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+
+    def load(self, db: Session):
+        """
+        Построить индекс дедлайнов из БД
+
+        Загружаются только открытые задачи с due_date или sla.
+        Уже прошедшие дедлайны считаются сработавшими (без повторных событий).
+
+        Args:
+            db: Сессия БД
+        """
+        self._heap.clear()
+        self._deadlines.clear()
+        self._meta.clear()
+
+        # Порциями: на PostgreSQL это серверный курсор, вся выборка в память не загружается
+        tasks = db.scalars(
+            select(Task)
+            .where(Task.status != DONE_STATUS)
+            .where((Task.due_date.isnot(None)) | (Task.sla.isnot(None)))
+            .execution_options(yield_per=1000)
+        )
+        now = datetime.utcnow()
+        for task in tasks:
+            self._track(task, now, notify_past=False)
+
+        self._notify()
+        logger.info(f"⏰ Дедлайнов в индексе: {self.tracked_count}")
+
+    @property
+    def tracked_count(self) -> int:
+        """Количество отслеживаемых дедлайнов"""
+        return sum(len(kinds) for kinds in self._deadlines.values())
+
+    def track(self, task: Task):
+        """
+        Добавить/обновить дедлайны задачи (вызывается после create/update)
+
+        Args:
+            task: Задача (модель или TaskResponse - нужны id, key, title, status, due_date, sla, created_at)
+        """
+        self._track(task, datetime.utcnow(), notify_past=True)
+        self._notify()
+
+    def untrack(self, task_id: int):
+        """
+        Убрать задачу из индекса (вызывается после delete)
+
+        Args:
+            task_id: ID задачи
+        """
+        self._deadlines.pop(task_id, None)
+        self._meta.pop(task_id, None)
+
+    def reload(self):
+        """Перестроить индекс в отдельной сессии (импорт или обрыв канала событий)"""
+        db = SessionLocal()
+        try:
+            self.load(db)
+        finally:
+            db.close()
+
+    async def apply_event(self, message: dict):
+        """
+        Обновить индекс по событию другого процесса (EventRelay)
+
+        Args:
+            message: WebSocket событие изменения задач
+        """
+        event_type = message.get("type")
+        if event_type in ("task_created", "task_updated"):
+            self.track(TaskResponse.model_validate(message["task"]))
+        elif event_type == "task_deleted":
+            self.untrack(message["task_id"])
+        elif event_type == "tasks_archived":
+            for task_id in message["task_ids"]:
+                self.untrack(task_id)
+        elif event_type == "tasks_imported":
+            self.reload()
+
+    def upcoming(self, until: datetime, kind: Optional[str] = None) -> List[Tuple[datetime, int, str]]:
+        """
+        Дедлайны, наступающие до указанного момента (включая уже просроченные)
+
+        Args:
+            until: Граница окна
+            kind: Фильтр по виду дедлайна (due / sla)
+
+        Returns:
+            Список (deadline, task_id, kind), отсортированный по времени
+        """
+        result = [
+            (deadline, task_id, deadline_kind)
+            for task_id, kinds in self._deadlines.items()
+            for deadline_kind, deadline in kinds.items()
+            if deadline <= until and (kind is None or deadline_kind == kind)
+        ]
+        result.sort()
+        return result
+
+    async def start(self):
+        """Запустить фоновый цикл"""
+        if self._runner is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._runner = asyncio.create_task(self._run())
+        logger.info("⏰ Deadline watcher запущен")
+
+    async def stop(self):
+        """Остановить фоновый цикл"""
+        if self._runner is None:
+            return
+        self._runner.cancel()
+        try:
+            await self._runner
+        except asyncio.CancelledError:
+            pass
+        self._runner = None
+        self._wakeup = None
+        logger.info("⏰ Deadline watcher остановлен")
+
+    def _track(self, task: Task, now: datetime, notify_past: bool):
+        deadlines = compute_deadlines(task)
+        if not deadlines:
+            self.untrack(task.id)
+            return
+
+        previous = self._deadlines.get(task.id, {})
+        self._deadlines[task.id] = deadlines
+        self._meta[task.id] = (task.key, task.title)
+
+        for kind, deadline in deadlines.items():
+            if previous.get(kind) == deadline:
+                # Дедлайн не изменился - запись в heap уже есть (или уже сработала)
+                continue
+            if deadline <= now and not notify_past:
+                continue
+            heapq.heappush(self._heap, (deadline, task.id, kind))
+
+    def _notify(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _pop_due(self, now: datetime) -> List[Tuple[datetime, int, str]]:
+        fired = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, task_id, kind = heapq.heappop(self._heap)
+            # Ленивая инвалидация: дедлайн мог измениться или задача закрыта
+            if self._deadlines.get(task_id, {}).get(kind) != deadline:
+                continue
+            fired.append((deadline, task_id, kind))
+        return fired
+
+    def _seconds_until_next(self, now: datetime) -> float:
+        # Отбрасываем устаревшие записи с вершины heap
+        while self._heap:
+            deadline, task_id, kind = self._heap[0]
+            if self._deadlines.get(task_id, {}).get(kind) == deadline:
+                return min(max((deadline - now).total_seconds(), 0.0), MAX_SLEEP_SECONDS)
+            heapq.heappop(self._heap)
+        return MAX_SLEEP_SECONDS
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            timeout = self._seconds_until_next(datetime.utcnow())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+            for deadline, task_id, kind in self._pop_due(datetime.utcnow()):
+                key, title = self._meta.get(task_id, (None, ""))
+                logger.info(f"⏰ {EVENT_TYPES[kind]}: ID={task_id}, key='{key}', deadline={deadline.isoformat()}")
+                try:
+                    await manager.broadcast({
+                        "type": EVENT_TYPES[kind],
+                        "task_id": task_id,
+                        "key": key,
+                        "title": title,
+                        "deadline": deadline.isoformat(),
+                    })
+                except Exception as e:
+                    logger.error(f"Ошибка рассылки события дедлайна: {e}")
+
+
+# Глобальный экземпляр сервиса дедлайнов
+deadline_watcher = DeadlineWatcher()
@@ -0,0 +1,494 @@
+"""
+История изменений задач
+
+Каждое изменение задачи пишется в журнал task_changes в той же транзакции,
+что и само изменение: создание - все поля, обновление - новые значения
+переданных полей {поле: стало}, удаление - без данных, перенос в архив -
+без данных, восстановление из архива - новый момент завершения. Прежние значения
+не читаются при записи (это был бы лишний запрос перед каждым UPDATE), а
+восстанавливаются воспроизведением журнала при его чтении.
+
+Состояние задачи или доски на момент времени восстанавливается от
+ближайшего предшествующего снимка воспроизведением журнала после него.
+Снимки делаются фоновым циклом и содержат только задачи, изменившиеся
+после предыдущего снимка, поэтому стоимость восстановления ограничена
+числом изменений за интервал между снимками.
+"""
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import asyncio
+import logging
+import os
+
+from sqlalchemy import and_, func, insert, select, text
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models import Task, ArchivedTask, TaskChange, HistorySnapshot, TaskSnapshot, TASK_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# Интервал между проверками необходимости снимка, секунды
+HISTORY_SNAPSHOT_INTERVAL = float(os.getenv("HISTORY_SNAPSHOT_INTERVAL", "3600"))
+
+# Снимок делается, только если после предыдущего накопилось столько записей журнала
+HISTORY_SNAPSHOT_MIN_CHANGES = int(os.getenv("HISTORY_SNAPSHOT_MIN_CHANGES", "500"))
+
+# Сколько ждать завершения транзакций, пишущих в журнал, перед снимком (PostgreSQL), мс
+HISTORY_SNAPSHOT_LOCK_TIMEOUT_MS = int(os.getenv("HISTORY_SNAPSHOT_LOCK_TIMEOUT_MS", "2000"))
+
+CREATED = "created"
+UPDATED = "updated"
+DELETED = "deleted"
+ARCHIVED = "archived"
+RESTORED = "restored"
+
+# Служебные поля не попадают в diff - они восстанавливаются из самой записи журнала
+SERVICE_FIELDS = ("updated_at", "version")
+
+# Размер порции при чтении текущего состояния задач для снимка
+_READ_CHUNK_SIZE = 500
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def task_state(task) -> Dict[str, Any]:
+    """Все поля задачи в JSON-совместимом виде"""
+    return {name: _json_value(getattr(task, name)) for name in TASK_COLUMNS}
+
+
+def _add(db: Session, task_id: int, action: str, version: Optional[int],
+         changes: Optional[Dict[str, Any]], session_id: Optional[str]):
+    db.add(TaskChange(
+        task_id=task_id,
+        changed_at=datetime.utcnow(),
+        action=action,
+        version=version,
+        session_id=session_id,
+        changes=changes,
+    ))
+
+
+def record_created(db: Session, task: Task, session_id: Optional[str] = None):
+    """Записать в журнал создание задачи (без commit)"""
+    _add(db, task.id, CREATED, task.version, task_state(task), session_id)
+
+
+def record_updated(db: Session, task: Task, fields: Iterable[str], session_id: Optional[str] = None):
+    """
+    Записать в журнал изменение задачи (без commit)
+
+    Args:
+        task: Задача после обновления (значения из UPDATE ... RETURNING)
+        fields: Переданные поля
+    """
+    changes = {name: _json_value(getattr(task, name)) for name in fields if name not in SERVICE_FIELDS}
+    _add(db, task.id, UPDATED, task.version, changes, session_id)
+
+
+def record_deleted(db: Session, task_id: int, version: Optional[int], session_id: Optional[str] = None):
+    """Записать в журнал удаление задачи (без commit)"""
+    _add(db, task_id, DELETED, version, None, session_id)
+
+
+def record_archived(db: Session, moved: Sequence, session_id: Optional[str] = None):
+    """
+    Записать в журнал перенос порции задач в архив (без commit)
+
+    Args:
+        moved: Строки (id, version) перенесённых задач
+    """
+    if not moved:
+        return
+    changed_at = datetime.utcnow()
+    db.execute(insert(TaskChange), [
+        {
+            "task_id": row.id,
+            "changed_at": changed_at,
+            "action": ARCHIVED,
+            "version": row.version,
+            "session_id": session_id,
+            "changes": None,
+        }
+        for row in moved
+    ])
+
+
+def record_restored(db: Session, task_id: int, version: int, completed_at: Optional[datetime],
+                    session_id: Optional[str] = None):
+    """Записать в журнал восстановление задачи из архива (без commit)"""
+    _add(db, task_id, RESTORED, version, {"completed_at": _json_value(completed_at)}, session_id)
+
+
+def record_imported(db: Session, task_ids: List[int], session_id: Optional[str] = None):
+    """Записать в журнал создание порции импортированных задач (без commit)"""
+    changed_at = datetime.utcnow()
+    db.execute(insert(TaskChange), [
+        {
+            "task_id": state["id"],
+            "changed_at": changed_at,
+            "action": CREATED,
+            "version": state["version"],
+            "session_id": session_id,
+            "changes": state,
+        }
+        for state in _current_states(db, task_ids).values()
+    ])
+
+
+def _current_states(db: Session, task_ids: Optional[List[int]]) -> Dict[int, Dict[str, Any]]:
+    """
+    Текущее состояние задач из рабочей таблицы и архива
+
+    Args:
+        task_ids: ID задач или None - все задачи
+    """
+    states: Dict[int, Dict[str, Any]] = {}
+    for model in (Task, ArchivedTask):
+        table = model.__table__
+        query = select(*(table.c[name] for name in TASK_COLUMNS))
+        if task_ids is None:
+            chunks = [query.execution_options(yield_per=_READ_CHUNK_SIZE)]
+        else:
+            chunks = [
+                query.where(table.c.id.in_(task_ids[start:start + _READ_CHUNK_SIZE]))
+                for start in range(0, len(task_ids), _READ_CHUNK_SIZE)
+            ]
+        for chunk in chunks:
+            for row in db.execute(chunk):
+                states[row.id] = {name: _json_value(value) for name, value in row._mapping.items()}
+    return states
+
+
+def _begin_snapshot_read(db: Session) -> int:
+    """
+    Начать чтение состояний для снимка и вернуть границу журнала
+
+    ID журнала выдаётся при INSERT, а коммит приходит позже: на PostgreSQL
+    изменение с меньшим ID может стать видимым уже после чтения max(id)
+    и никогда не попасть в воспроизведение. Поэтому отдельное соединение
+    берёт блокировку SHARE на журнал (она дожидается транзакций, уже пишущих
+    в журнал, и не пускает новые), читает max(id) и экспортирует свой снимок
+    данных. Сессия импортирует этот снимок (REPEATABLE READ) и читает
+    состояния ровно на границе, а блокировка снимается сразу, до чтения.
+
+    На SQLite писатель один, и незакоммиченный ID всегда больше max(id).
+
+    Raises:
+        OperationalError: Транзакции не завершились за HISTORY_SNAPSHOT_LOCK_TIMEOUT_MS
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return db.scalar(select(func.max(TaskChange.id))) or 0
+
+    with db.get_bind().connect() as locker:
+        locker.execution_options(isolation_level="REPEATABLE READ")
+        locker.execute(text(f"SET LOCAL lock_timeout = {HISTORY_SNAPSHOT_LOCK_TIMEOUT_MS}"))
+        locker.execute(text(f"LOCK TABLE {TaskChange.__tablename__} IN SHARE MODE"))
+        last_change_id = locker.scalar(select(func.max(TaskChange.id))) or 0
+        exported = locker.scalar(text("SELECT pg_export_snapshot()"))
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        db.execute(text(f"SET TRANSACTION SNAPSHOT '{exported}'"))
+        locker.rollback()
+    return last_change_id
+
+
+def take_snapshot(db: Session, min_changes: int = 1) -> Optional[HistorySnapshot]:
+    """
+    Сделать снимок задач, изменившихся после предыдущего снимка
+
+    Первый снимок содержит все задачи. Момент снимка фиксируется после
+    чтения состояния, поэтому в снимок не попадают изменения позже taken_at.
+
+    Состояния читаются в одном снимке данных с границей журнала
+    (last_change_id), поэтому изменение, закоммиченное во время снимка,
+    не теряется: оно либо до границы и уже в состоянии, либо после неё
+    и будет воспроизведено.
+
+    Args:
+        db: Сессия БД
+        min_changes: Не делать снимок, если записей журнала меньше
+
+    Returns:
+        HistorySnapshot или None, если снимок не понадобился
+
+    Raises:
+        OperationalError: Не дождались транзакций, пишущих в журнал (PostgreSQL)
+    """
+    last_change_id = _begin_snapshot_read(db)
+    previous = db.scalars(select(HistorySnapshot).order_by(HistorySnapshot.id.desc()).limit(1)).first()
+
+    if previous is None:
+        states = _current_states(db, None)
+        task_ids = list(states)
+    else:
+        if last_change_id - previous.last_change_id < max(min_changes, 1):
+            return None
+        task_ids = db.scalars(
+            select(TaskChange.task_id)
+            .where(TaskChange.id > previous.last_change_id, TaskChange.id <= last_change_id)
+            .distinct()
+        ).all()
+        states = _current_states(db, task_ids)
+
+    snapshot = HistorySnapshot(taken_at=datetime.utcnow(), last_change_id=last_change_id, task_count=len(task_ids))
+    db.add(snapshot)
+    db.flush()
+    if task_ids:
+        # Задачи, которых больше нет, записываются с data = null
+        db.execute(insert(TaskSnapshot), [
+            {"snapshot_id": snapshot.id, "task_id": task_id, "data": states.get(task_id)}
+            for task_id in task_ids
+        ])
+    db.commit()
+    return snapshot
+
+
+def _apply(state: Optional[Dict[str, Any]], change: TaskChange) -> Optional[Dict[str, Any]]:
+    """Применить запись журнала к состоянию задачи"""
+    if change.action == DELETED:
+        return None
+    if change.action == CREATED:
+        state = dict(change.changes or {})
+    elif state is None:
+        # Задача появилась раньше журнала и первого снимка - восстановить нельзя
+        return None
+    else:
+        # archived не меняет задачу, restored - только момент завершения
+        state = {**state, **(change.changes or {})}
+    state["version"] = change.version
+    if change.action in (CREATED, UPDATED):
+        state["updated_at"] = change.changed_at.isoformat()
+    return state
+
+
+def _snapshot_before(db: Session, at: datetime) -> Optional[HistorySnapshot]:
+    return db.scalars(
+        select(HistorySnapshot)
+        .where(HistorySnapshot.taken_at <= at)
+        .order_by(HistorySnapshot.taken_at.desc(), HistorySnapshot.id.desc())
+        .limit(1)
+    ).first()
+
+
+def task_as_of(db: Session, task_id: int, at: datetime) -> Optional[Dict[str, Any]]:
+    """
+    Состояние задачи на момент времени
+
+    Args:
+        db: Сессия БД
+        task_id: ID задачи
+        at: Момент времени (UTC)
+
+    Returns:
+        Поля задачи или None, если задачи в этот момент не было
+    """
+    state = None
+    after_change_id = 0
+    snapshot = _snapshot_before(db, at)
+    if snapshot is not None:
+        row = db.execute(
+            select(TaskSnapshot.data, HistorySnapshot.last_change_id)
+            .join(HistorySnapshot, HistorySnapshot.id == TaskSnapshot.snapshot_id)
+            .where(TaskSnapshot.task_id == task_id, TaskSnapshot.snapshot_id <= snapshot.id)
+            .order_by(TaskSnapshot.snapshot_id.desc())
+            .limit(1)
+        ).first()
+        if row is not None:
+            state, after_change_id = row.data, row.last_change_id
+
+    changes = db.scalars(
+        select(TaskChange)
+        .where(TaskChange.task_id == task_id, TaskChange.id > after_change_id, TaskChange.changed_at <= at)
+        .order_by(TaskChange.id)
+    )
+    for change in changes:
+        state = _apply(state, change)
+    return state
+
+
+def board_as_of(db: Session, at: datetime, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Состояние доски на момент времени
+
+    Args:
+        db: Сессия БД
+        at: Момент времени (UTC)
+        filters: Поле → значение (status, priority, assignee, sprint_id ...),
+            применяются к восстановленному состоянию
+
+    Returns:
+        List[dict]: Задачи, существовавшие в этот момент, по возрастанию ID
+    """
+    states: Dict[int, Dict[str, Any]] = {}
+    after_change_id = 0
+    snapshot = _snapshot_before(db, at)
+    if snapshot is not None:
+        # Последнее состояние каждой задачи среди снимков до выбранного включительно
+        latest = (
+            select(TaskSnapshot.task_id, func.max(TaskSnapshot.snapshot_id).label("snapshot_id"))
+            .where(TaskSnapshot.snapshot_id <= snapshot.id)
+            .group_by(TaskSnapshot.task_id)
+            .subquery()
+        )
+        rows = db.execute(
+            select(TaskSnapshot.task_id, TaskSnapshot.data)
+            .join(latest, and_(TaskSnapshot.task_id == latest.c.task_id,
+                               TaskSnapshot.snapshot_id == latest.c.snapshot_id))
+        )
+        states = {row.task_id: row.data for row in rows if row.data is not None}
+        after_change_id = snapshot.last_change_id
+
+    changes = db.scalars(
+        select(TaskChange)
+        .where(TaskChange.id > after_change_id, TaskChange.changed_at <= at)
+        .order_by(TaskChange.id)
+        .execution_options(yield_per=_READ_CHUNK_SIZE)
+    )
+    for change in changes:
+        state = _apply(states.get(change.task_id), change)
+        if state is None:
+            states.pop(change.task_id, None)
+        else:
+            states[change.task_id] = state
+
+    filters = {name: value for name, value in (filters or {}).items() if value is not None}
+    return [
+        state for _, state in sorted(states.items())
+        if all(state.get(name) == value for name, value in filters.items())
+    ]
+
+
+def task_changes(db: Session, task_id: int, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+    """
+    Журнал изменений задачи, новые записи первыми
+
+    Прежние значения полей (previous) восстанавливаются воспроизведением
+    журнала задачи от последнего снимка перед страницей. Поля, переданные
+    без изменения значения, из changes убираются.
+
+    Returns:
+        List[dict]: Записи журнала с полями changes и previous
+    """
+    page = db.scalars(
+        select(TaskChange)
+        .where(TaskChange.task_id == task_id)
+        .order_by(TaskChange.id.desc())
+        .offset(offset)
+        .limit(limit)
+    ).all()
+    if not page:
+        return []
+
+    state = None
+    after_change_id = 0
+    first_id = page[-1].id
+    row = db.execute(
+        select(TaskSnapshot.data, HistorySnapshot.last_change_id)
+        .join(HistorySnapshot, HistorySnapshot.id == TaskSnapshot.snapshot_id)
+        .where(TaskSnapshot.task_id == task_id, HistorySnapshot.last_change_id < first_id)
+        .order_by(TaskSnapshot.snapshot_id.desc())
+        .limit(1)
+    ).first()
+    if row is not None:
+        state, after_change_id = row.data, row.last_change_id
+
+    previous: Dict[int, Optional[Dict[str, Any]]] = {}
+    changes = db.scalars(
+        select(TaskChange)
+        .where(TaskChange.task_id == task_id, TaskChange.id > after_change_id, TaskChange.id <= page[0].id)
+        .order_by(TaskChange.id)
+    )
+    for change in changes:
+        previous[change.id] = state
+        state = _apply(state, change)
+
+    entries = []
+    for change in page:
+        entry = {
+            "id": change.id,
+            "task_id": change.task_id,
+            "changed_at": change.changed_at,
+            "action": change.action,
+            "version": change.version,
+            "session_id": change.session_id,
+            "changes": change.changes,
+            "previous": None,
+        }
+        before = previous.get(change.id)
+        if change.action in (UPDATED, RESTORED) and change.changes and before is not None:
+            entry["changes"] = {
+                name: value for name, value in change.changes.items() if before.get(name) != value
+            }
+            entry["previous"] = {name: before.get(name) for name in entry["changes"]}
+        entries.append(entry)
+    return entries
+
+
+class HistorySnapshotter:
+    """
+    Фоновые снимки истории
+
+    Раз в HISTORY_SNAPSHOT_INTERVAL проверяет, сколько записей журнала
+    накопилось после последнего снимка, и делает новый снимок, если их
+    не меньше HISTORY_SNAPSHOT_MIN_CHANGES. Первый снимок делается сразу.
+    """
+
+    def __init__(self):
+        self._runner: Optional[asyncio.Task] = None
+
+    async def run_once(self, min_changes: int = HISTORY_SNAPSHOT_MIN_CHANGES) -> Optional[int]:
+        """
+        Сделать снимок, если он нужен
+
+        Returns:
+            Число задач в снимке или None, если снимок не делался
+        """
+        task_count = await asyncio.to_thread(self._take_snapshot, min_changes)
+        if task_count is not None:
+            logger.info(f"📸 Снимок истории: задач {task_count}")
+        return task_count
+
+    @staticmethod
+    def _take_snapshot(min_changes: int) -> Optional[int]:
+        db = SessionLocal()
+        try:
+            snapshot = take_snapshot(db, min_changes)
+            return snapshot.task_count if snapshot is not None else None
+        finally:
+            db.close()
+
+    async def start(self):
+        """Запустить фоновый цикл"""
+        if self._runner is not None or HISTORY_SNAPSHOT_INTERVAL <= 0:
+            return
+        self._runner = asyncio.create_task(self._run())
+        logger.info(f"📸 Снимки истории: проверка раз в {HISTORY_SNAPSHOT_INTERVAL:g} с, "
+                    f"от {HISTORY_SNAPSHOT_MIN_CHANGES} изменений")
+
+    async def stop(self):
+        """Остановить фоновый цикл"""
+        if self._runner is None:
+            return
+        self._runner.cancel()
+        try:
+            await self._runner
+        except asyncio.CancelledError:
+            pass
+        self._runner = None
+        logger.info("📸 Снимки истории остановлены")
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Ошибка снимка истории: {e}")
+            await asyncio.sleep(HISTORY_SNAPSHOT_INTERVAL)
+
+
+# Глобальный экземпляр
+history_snapshotter = HistorySnapshotter()
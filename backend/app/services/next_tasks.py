@@ -0,0 +1,196 @@
+"""
+Подбор задач, которые можно сделать прямо сейчас
+
+Запрос фильтрует открытые задачи по контексту выполнения (место, сеть,
+окружение, режим, уровень важности) в SQL, ранжирует их по приоритету,
+сроку и штрафу за пропуск и читает кандидатов страницами - полная
+таблица не загружается. Инструменты и блокировки проверяются уже
+для страницы кандидатов.
+"""
+from datetime import date, timedelta
+from typing import Iterable, List, Optional, Set, Tuple
+import logging
+
+from sqlalchemy import and_, case, or_, select
+from sqlalchemy.orm import Session
+
+from ..models import Task
+from .deadlines import DONE_STATUS
+
+logger = logging.getLogger(__name__)
+
+# Открытые статусы (IN по ним использует индекс, в отличие от status != 'Done')
+OPEN_STATUSES = ("Backlog", "To Do", "In Progress")
+IN_PROGRESS_STATUS = "In Progress"
+
+# Значения контекстных полей
+ANY_LOCATION = "Любое"
+ONLINE = "Online"
+QUIET = "Тишина"
+CORE_LEVEL = "Core"
+
+# Веса ранжирования
+PRIORITY_POINTS = {
+    "Critical": 50,
+    "High": 40,
+    "Medium": 30,
+    "Low": 20,
+    "Lowest": 10,
+}
+DEFAULT_PRIORITY_POINTS = 30
+# (дней до срока включительно, баллы); просроченные попадают в первую ступень
+DUE_POINTS = ((0, 30), (3, 20), (7, 10))
+SKIP_PENALTY_POINTS = 15
+CORE_POINTS = 5
+IN_PROGRESS_POINTS = 5
+
+# Во сколько раз кандидатов читается больше, чем нужно (часть отсеется по инструментам и блокировкам)
+OVERFETCH = 4
+MIN_PAGE_SIZE = 50
+
+
+def _context_filters(
+    location: Optional[str],
+    environment: Optional[str],
+    connectivity: Optional[str],
+    execution_mode: Optional[str],
+    maintenance_level: Optional[str],
+) -> list:
+    """SQL условия контекста; пустое поле задачи означает «подходит везде»"""
+    filters = [Task.status.in_(OPEN_STATUSES)]
+    if location:
+        filters.append(or_(Task.location.in_((location, ANY_LOCATION)), Task.location.is_(None)))
+    if connectivity and connectivity != ONLINE:
+        # Без сети доступны задачи, не требующие Online
+        filters.append(or_(Task.connectivity != ONLINE, Task.connectivity.is_(None)))
+    if environment and environment != QUIET:
+        # В шуме недоступны задачи, требующие тишины
+        filters.append(or_(Task.environment != QUIET, Task.environment.is_(None)))
+    if execution_mode:
+        filters.append(or_(Task.execution_mode == execution_mode, Task.execution_mode.is_(None)))
+    if maintenance_level:
+        filters.append(Task.maintenance_level == maintenance_level)
+    return filters
+
+
+def _score_expression(today: date):
+    priority = case(PRIORITY_POINTS, value=Task.priority, else_=DEFAULT_PRIORITY_POINTS)
+    due = case(
+        *((Task.due_date <= today + timedelta(days=days), points) for days, points in DUE_POINTS),
+        else_=0
+    )
+    skip_penalty = case((and_(Task.skip_penalty.isnot(None), Task.skip_penalty != ""), SKIP_PENALTY_POINTS), else_=0)
+    core = case((Task.maintenance_level == CORE_LEVEL, CORE_POINTS), else_=0)
+    in_progress = case((Task.status == IN_PROGRESS_STATUS, IN_PROGRESS_POINTS), else_=0)
+    return priority + due + skip_penalty + core + in_progress
+
+
+def explain_score(task: Task, today: date) -> Tuple[int, List[str]]:
+    """
+    Балл задачи и причины ранжирования (для ответа голосовому ассистенту)
+
+    Веса совпадают с SQL выражением сортировки.
+    """
+    score = PRIORITY_POINTS.get(task.priority, DEFAULT_PRIORITY_POINTS)
+    reasons = [f"приоритет {task.priority}"]
+
+    if task.due_date is not None:
+        days_left = (task.due_date - today).days
+        for days, points in DUE_POINTS:
+            if days_left <= days:
+                score += points
+                if days_left < 0:
+                    reasons.append(f"просрочена на {-days_left} дн.")
+                elif days_left == 0:
+                    reasons.append("срок сегодня")
+                else:
+                    reasons.append(f"срок через {days_left} дн.")
+                break
+    if task.skip_penalty:
+        score += SKIP_PENALTY_POINTS
+        reasons.append("есть штраф за пропуск")
+    if task.maintenance_level == CORE_LEVEL:
+        score += CORE_POINTS
+        reasons.append("обязательная")
+    if task.status == IN_PROGRESS_STATUS:
+        score += IN_PROGRESS_POINTS
+        reasons.append("уже в работе")
+    return score, reasons
+
+
+def _blocked_by(task: Task) -> List[int]:
+    dependencies = task.dependencies if isinstance(task.dependencies, dict) else {}
+    blockers = dependencies.get("blocked_by") or []
+    return [blocker for blocker in blockers if isinstance(blocker, int)]
+
+
+def _open_blockers(db: Session, tasks: Iterable[Task]) -> Set[int]:
+    """ID блокирующих задач, которые ещё не завершены (один запрос на страницу)"""
+    blocker_ids = {blocker for task in tasks for blocker in _blocked_by(task)}
+    if not blocker_ids:
+        return set()
+    return set(db.scalars(
+        select(Task.id).where(Task.id.in_(blocker_ids), Task.status != DONE_STATUS)
+    ).all())
+
+
+def find_next_tasks(
+    db: Session,
+    *,
+    location: Optional[str] = None,
+    tools: Optional[Iterable[str]] = None,
+    environment: Optional[str] = None,
+    connectivity: Optional[str] = None,
+    execution_mode: Optional[str] = None,
+    maintenance_level: Optional[str] = None,
+    limit: int = 5,
+    today: Optional[date] = None,
+) -> List[Tuple[Task, int, List[str]]]:
+    """
+    Подобрать top-k задач под текущий контекст
+
+    Args:
+        db: Сессия БД
+        location: Где пользователь (задачи с «Любое» и без места подходят всегда)
+        tools: Доступные инструменты (None - не проверять)
+        environment: Тишина / Фон
+        connectivity: Online / Offline
+        execution_mode: Solo / Async / Sync
+        maintenance_level: Только задачи с этим уровнем (Core / Optional)
+        limit: Сколько задач вернуть
+        today: Текущая дата (для тестов и часовых поясов клиента)
+
+    Returns:
+        List[(задача, балл, причины)] по убыванию балла
+    """
+    today = today or date.today()
+    available_tools = {tool.strip().lower() for tool in tools if tool.strip()} if tools is not None else None
+    score = _score_expression(today).label("score")
+
+    query = (
+        select(Task, score)
+        .where(*_context_filters(location, environment, connectivity, execution_mode, maintenance_level))
+        .order_by(score.desc(), Task.due_date.is_(None), Task.due_date, Task.id)
+    )
+    page_size = max(limit * OVERFETCH, MIN_PAGE_SIZE)
+
+    results: List[Tuple[Task, int, List[str]]] = []
+    offset = 0
+    while len(results) < limit:
+        page = db.execute(query.offset(offset).limit(page_size)).all()
+        open_blockers = _open_blockers(db, (task for task, _ in page))
+        for task, _ in page:
+            if available_tools is not None and task.tools_required:
+                if not {tool.lower() for tool in task.tools_required} <= available_tools:
+                    continue
+            if open_blockers.intersection(_blocked_by(task)):
+                continue
+            task_score, reasons = explain_score(task, today)
+            results.append((task, task_score, reasons))
+            if len(results) == limit:
+                break
+        if len(page) < page_size:
+            break
+        offset += page_size
+
+    return results
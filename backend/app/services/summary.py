@@ -0,0 +1,172 @@
+"""
+Board Summary
+Счётчики задач по статусу, приоритету, исполнителю и спринту
+
+Счётчики хранятся в таблице task_summary и меняются триггерами на tasks
+в той же транзакции, что и сама задача, поэтому верны при любом числе
+воркеров и контейнеров. Чтение сводки - выборка десятков строк
+task_summary, а не GROUP BY по задачам.
+"""
+from typing import Dict, Optional, Tuple
+import asyncio
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models import TaskSummaryCount
+from ..websocket import manager
+
+logger = logging.getLogger(__name__)
+
+# Измерения сводки (колонки задачи - в миграции 0009)
+DIMENSIONS = ("status", "priority", "assignee", "sprint")
+
+# Ключ корзины для пустого значения (нет исполнителя / спринта)
+NONE_KEY = "null"
+
+# Изменения: измерение → {значение: новый счётчик}
+Changes = Dict[str, Dict[str, int]]
+
+
+class BoardSummary:
+    """
+    Сводка по доске
+
+    В памяти держится последняя прочитанная из task_summary сводка - это
+    только кэш: по нему вычисляются изменившиеся корзины для события
+    summary_changed. После изменения задачи счётчики перечитываются одним
+    запросом; запросы, пришедшие, пока идёт чтение, обслуживаются
+    следующим чтением, а не каждый своим.
+    """
+
+    def __init__(self):
+        self._counts: Changes = {dimension: {} for dimension in DIMENSIONS}
+        self._total = 0
+        self._lock = asyncio.Lock()
+        # Номер последнего запроса на публикацию и номер запроса, уже покрытого чтением
+        self._requested = 0
+        self._published = 0
+
+    def load(self, db: Session):
+        """
+        Заполнить кэш счётчиков из БД
+
+        Args:
+            db: Сессия БД
+        """
+        self._total, self._counts = self.query(db)
+        logger.info(f"📊 Сводка по доске загружена: задач {self._total}")
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    def counts(self) -> Changes:
+        """Все счётчики кэша в формате изменений"""
+        return {dimension: dict(buckets) for dimension, buckets in self._counts.items()}
+
+    def snapshot(self, db: Session) -> Dict:
+        """Текущая сводка из БД: total и счётчики по каждому измерению"""
+        total, counts = self.query(db)
+        summary = {"total": total}
+        for dimension, buckets in counts.items():
+            summary[f"by_{dimension}"] = buckets
+        return summary
+
+    @staticmethod
+    def query(db: Session) -> Tuple[int, Changes]:
+        """
+        Прочитать счётчики из task_summary
+
+        Returns:
+            (total, счётчики по измерениям) - пустые корзины не возвращаются
+        """
+        counts: Changes = {dimension: {} for dimension in DIMENSIONS}
+        rows = db.execute(
+            select(TaskSummaryCount.dimension, TaskSummaryCount.bucket, TaskSummaryCount.count)
+            .where(TaskSummaryCount.count > 0)
+        )
+        for dimension, bucket, count in rows:
+            counts.setdefault(dimension, {})[bucket] = count
+        # Каждая задача ровно в одной корзине статуса
+        total = sum(counts["status"].values())
+        return total, counts
+
+    async def apply_event(self, message: dict):
+        """
+        Учесть в кэше сводку, разосланную другим процессом (EventRelay)
+
+        Иначе следующее событие этого процесса повторило бы уже
+        разосланные корзины.
+        """
+        if message.get("type") != "summary_changed":
+            return
+        for dimension, buckets in message["changes"].items():
+            cached = self._counts.setdefault(dimension, {})
+            for bucket, count in buckets.items():
+                if count:
+                    cached[bucket] = count
+                else:
+                    cached.pop(bucket, None)
+        self._total = message["total"]
+
+    def _diff(self, counts: Changes) -> Changes:
+        """Корзины, изменившиеся относительно кэша (0 - корзина опустела)"""
+        changes: Changes = {}
+        for dimension in DIMENSIONS:
+            old = self._counts.get(dimension, {})
+            new = counts.get(dimension, {})
+            changed = {bucket: count for bucket, count in new.items() if old.get(bucket) != count}
+            changed.update({bucket: 0 for bucket in old if bucket not in new})
+            if changed:
+                changes[dimension] = changed
+        return changes
+
+    async def publish(self, session_id: Optional[str] = None):
+        """
+        Перечитать счётчики после изменения задач и разослать изменившиеся
+        корзины событием summary_changed
+
+        Отправляются только затронутые корзины (0 - корзина опустела)
+        и общий total. Если ничего не изменилось, событие не рассылается.
+        """
+        self._requested += 1
+        requested = self._requested
+        async with self._lock:
+            if self._published >= requested:
+                # Чтение, начатое после этого запроса, уже учло изменение
+                return
+            self._published = self._requested
+            total, counts = await asyncio.to_thread(self._query)
+            changes = self._diff(counts)
+            self._total, self._counts = total, counts
+            if not changes:
+                return
+            # Под блокировкой: события уходят в порядке чтения счётчиков
+            await manager.broadcast({
+                "type": "summary_changed",
+                "total": total,
+                "changes": changes,
+                "session_id": session_id,
+            })
+
+    def reload(self):
+        """Перечитать кэш в отдельной сессии (после обрыва канала событий)"""
+        db = SessionLocal()
+        try:
+            self.load(db)
+        finally:
+            db.close()
+
+    def _query(self) -> Tuple[int, Changes]:
+        db = SessionLocal()
+        try:
+            return self.query(db)
+        finally:
+            db.close()
+
+
+# Глобальный экземпляр сводки
+board_summary = BoardSummary()
@@ -2,5 +2,7 @@
 WebSocket package
 """
 from .manager import manager, ConnectionManager
+from .coalescing import EventCoalescer
+from .relay import event_relay, EventRelay
 
-__all__ = ['manager', 'ConnectionManager']
+__all__ = ['manager', 'ConnectionManager', 'EventCoalescer', 'event_relay', 'EventRelay']
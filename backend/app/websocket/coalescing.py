@@ -0,0 +1,111 @@
+"""
+Слияние WebSocket событий в окне коалесценции
+
+Несколько событий об одной задаче за короткое окно заменяются одним -
+с последним состоянием задачи. Порядок сохраняется: событие встаёт на
+место первого события своей задачи, а несливаемые события (импорт,
+дедлайны) служат барьером - после них слияние начинается заново.
+
+Сводка по доске (summary_changed) описывает состояние после всех событий
+окна, поэтому сливается в одно событие, которое отправляется последним.
+"""
+from typing import Dict, Hashable, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# События с полным состоянием задачи (поле task)
+TASK_EVENTS = ("task_created", "task_updated")
+
+
+def _merge_key(message: dict) -> Optional[Hashable]:
+    message_type = message.get("type")
+    if message_type in TASK_EVENTS:
+        return ("task", message["task"]["id"])
+    if message_type == "task_deleted":
+        return ("task", message["task_id"])
+    return None
+
+
+def _merge(previous: dict, current: dict) -> Optional[dict]:
+    """
+    Слить два события об одном объекте
+
+    Returns:
+        Итоговое событие или None, если события сливать нельзя
+    """
+    previous_type = previous["type"]
+    current_type = current["type"]
+
+    if current_type == "summary_changed":
+        changes = {dimension: dict(buckets) for dimension, buckets in previous["changes"].items()}
+        for dimension, buckets in current["changes"].items():
+            changes.setdefault(dimension, {}).update(buckets)
+        return {**current, "changes": changes}
+
+    if previous_type == "task_deleted":
+        # ID мог быть переиспользован новой задачей - порядок удаление → создание важен
+        return None
+    if current_type == "task_deleted":
+        return current
+    if previous_type == "task_created":
+        # Клиент ещё не видел задачу - это по-прежнему создание, но с последним состоянием
+        return {**current, "type": "task_created"}
+    return current
+
+
+class EventCoalescer:
+    """
+    Буфер событий одного окна коалесценции
+
+    Attributes:
+        merged: Сколько событий было поглощено слиянием (для метрик)
+    """
+
+    def __init__(self):
+        self._events: List[dict] = []
+        # Ключ слияния → позиция события в _events (только после последнего барьера)
+        self._positions: Dict[Hashable, int] = {}
+        # Слитая сводка окна, отправляется после всех остальных событий
+        self._summary: Optional[dict] = None
+        self.merged = 0
+
+    def __len__(self) -> int:
+        return len(self._events) + (self._summary is not None)
+
+    def add(self, message: dict):
+        """Добавить событие, слив его с ранее добавленным событием того же объекта"""
+        if message.get("type") == "summary_changed":
+            if self._summary is not None:
+                message = _merge(self._summary, message)
+                self.merged += 1
+            self._summary = message
+            return
+
+        key = _merge_key(message)
+        if key is None:
+            # Барьер: последующие события не сливаются с теми, что были до него
+            self._events.append(message)
+            self._positions.clear()
+            return
+
+        position = self._positions.get(key)
+        if position is not None:
+            merged = _merge(self._events[position], message)
+            if merged is not None:
+                self._events[position] = merged
+                self.merged += 1
+                return
+
+        self._positions[key] = len(self._events)
+        self._events.append(message)
+
+    def drain(self) -> List[dict]:
+        """Забрать накопленные события и очистить буфер"""
+        events = self._events
+        if self._summary is not None:
+            events.append(self._summary)
+        self._events = []
+        self._positions = {}
+        self._summary = None
+        return events
@@ -3,12 +3,60 @@ WebSocket Connection Manager
 Управляет подключениями и broadcast сообщений всем клиентам
 """
 from fastapi import WebSocket
-from typing import List
+from datetime import datetime
+from typing import Dict, Optional, Set, Union
+import asyncio
 import logging
-import json
+import os
+import time
+
+from ..monitoring import metrics, profile_section
+from ..encoding import JSON, encode, negotiate_subprotocol
+from .coalescing import EventCoalescer
+from .relay import event_relay
 
 logger = logging.getLogger(__name__)
 
+# Интервал отправки ping клиентам, секунды (0 - heartbeat выключен)
+HEARTBEAT_INTERVAL = float(os.getenv("WS_HEARTBEAT_INTERVAL", "25"))
+
+# Соединение без входящих сообщений дольше этого времени закрывается, секунды
+IDLE_TIMEOUT = float(os.getenv("WS_IDLE_TIMEOUT", "75"))
+
+# Сколько ждать отправки ping / закрытия зависшего соединения, секунды
+SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "5"))
+
+# Окно слияния событий, мс (0 - каждое событие отправляется сразу)
+COALESCE_MS = float(os.getenv("WS_COALESCE_MS", "0"))
+
+
+class ConnectionInfo:
+    """
+    Метаданные WebSocket соединения
+
+    Attributes:
+        client: Адрес клиента (host:port)
+        user_agent: User-Agent из заголовков handshake
+        connected_at: Время подключения (UTC)
+        last_seen: Последнее входящее сообщение (time.monotonic)
+        messages_received: Количество входящих сообщений
+        encoding: Кодировка кадров (json / json.compact / msgpack), по подпротоколу
+    """
+
+    __slots__ = ("client", "user_agent", "connected_at", "last_seen", "messages_received", "encoding")
+
+    def __init__(self, websocket: WebSocket, encoding: str = JSON):
+        client = websocket.client
+        self.client = f"{client.host}:{client.port}" if client else "unknown"
+        self.user_agent = websocket.headers.get("user-agent")
+        self.connected_at = datetime.utcnow()
+        self.last_seen = time.monotonic()
+        self.messages_received = 0
+        self.encoding = encoding
+
+    def idle_for(self, now: float) -> float:
+        return now - self.last_seen
+
 
 class ConnectionManager:
     """
@@ -17,11 +65,21 @@ class ConnectionManager:
     Отвечает за:
     - Подключение/отключение клиентов
     - Broadcast сообщений всем подключенным клиентам
-    - Обработку отключенных соединений
+    - Heartbeat (ping) и закрытие неактивных соединений
     """
     
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        # dict: O(1) подключение/отключение, порядок вставки сохраняется
+        self.active_connections: Dict[WebSocket, ConnectionInfo] = {}
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._coalescer = EventCoalescer()
+        self._flush: Optional[asyncio.Task] = None
+        # Рассылки идут строго по очереди: следующая ждёт, пока уйдёт предыдущая
+        self._send_lock = asyncio.Lock()
+        # Фоновые закрытия соединений, на которых не прошла отправка
+        self._closing: Set[asyncio.Task] = set()
+        # События, ожидающие блокировки или отправляемые сейчас (без буфера окна слияния)
+        self._queued = 0
     
     async def connect(self, websocket: WebSocket):
         """
@@ -30,9 +88,13 @@ class ConnectionManager:
         Args:
             websocket: WebSocket соединение
         """
-        await websocket.accept()
-        self.active_connections.append(websocket)
-        logger.info(f"✅ Новый клиент подключен. Всего клиентов: {len(self.active_connections)}")
+        # Подпротокол msgpack / json.compact выбирает компактную кодировку кадров
+        subprotocol = negotiate_subprotocol(websocket.scope.get("subprotocols", []))
+        await websocket.accept(subprotocol=subprotocol)
+        info = ConnectionInfo(websocket, encoding=subprotocol or JSON)
+        self.active_connections[websocket] = info
+        logger.info(f"✅ Новый клиент подключен: {info.client} ({info.encoding}). "
+                    f"Всего клиентов: {len(self.active_connections)}")
     
     def disconnect(self, websocket: WebSocket):
         """
@@ -41,31 +103,207 @@ class ConnectionManager:
         Args:
             websocket: WebSocket соединение
         """
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-            logger.info(f"❌ Клиент отключен. Всего клиентов: {len(self.active_connections)}")
+        info = self.active_connections.pop(websocket, None)
+        if info is not None:
+            logger.info(f"❌ Клиент отключен: {info.client}. Всего клиентов: {len(self.active_connections)}")
+
+    @property
+    def queue_depth(self) -> int:
+        """События, ещё не отправленные клиентам: ждущие очереди рассылки и накопленные в окне слияния"""
+        return self._queued + len(self._coalescer)
+
+    def touch(self, websocket: WebSocket):
+        """
+        Отметить входящее сообщение от клиента (любое сообщение, включая pong)
+
+        Args:
+            websocket: WebSocket соединение
+        """
+        info = self.active_connections.get(websocket)
+        if info is not None:
+            info.last_seen = time.monotonic()
+            info.messages_received += 1
+
+    async def start(self):
+        """Запустить фоновый heartbeat"""
+        if self._heartbeat is not None or HEARTBEAT_INTERVAL <= 0:
+            return
+        self._heartbeat = asyncio.create_task(self._run_heartbeat())
+        logger.info(f"💓 WebSocket heartbeat запущен: ping каждые {HEARTBEAT_INTERVAL:g} с, таймаут {IDLE_TIMEOUT:g} с")
+
+    async def stop(self):
+        """Остановить фоновый heartbeat и отправить накопленные события"""
+        if self._flush is not None:
+            self._flush.cancel()
+            self._flush = None
+            await self.flush()
+        if self._heartbeat is None:
+            return
+        self._heartbeat.cancel()
+        try:
+            await self._heartbeat
+        except asyncio.CancelledError:
+            pass
+        self._heartbeat = None
+        logger.info("💓 WebSocket heartbeat остановлен")
+
+    async def _run_heartbeat(self):
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                logger.error(f"Ошибка WebSocket heartbeat: {e}")
+
+    async def heartbeat(self):
+        """
+        Один проход heartbeat: закрыть неактивные соединения, остальным отправить ping
+
+        Клиент должен ответить {"type": "pong"} (или прислать любое сообщение)
+        в течение WS_IDLE_TIMEOUT, иначе соединение считается зависшим.
+        """
+        now = time.monotonic()
+        idle = []
+        alive = []
+        for websocket, info in list(self.active_connections.items()):
+            if IDLE_TIMEOUT > 0 and info.idle_for(now) > IDLE_TIMEOUT:
+                idle.append(websocket)
+            else:
+                alive.append(websocket)
+
+        ping = {"type": "ping", "ts": time.time()}
+        results = await asyncio.gather(
+            *(self._reap(websocket) for websocket in idle),
+            *(self._send_with_timeout(websocket, ping) for websocket in alive),
+        )
+        failed = results.count(False)
+        if idle or failed:
+            logger.info(f"💓 Heartbeat: закрыто неактивных {len(idle)}, ошибок ping {failed}, "
+                        f"осталось клиентов {len(self.active_connections)}")
+
+    async def _send_with_timeout(self, websocket: WebSocket, message: dict) -> bool:
+        return await self._send_frame_with_timeout(websocket, self._encode_for(websocket, message))
+
+    async def _send_frame_with_timeout(self, websocket: WebSocket, frame: Union[str, bytes]) -> bool:
+        try:
+            await asyncio.wait_for(self._send_frame(websocket, frame), SEND_TIMEOUT)
+            return True
+        except Exception:
+            metrics.websocket_send_errors.inc()
+            if websocket in self.active_connections:
+                self.disconnect(websocket)
+                # Закрываем в фоне, чтобы не держать рассылку ещё один таймаут:
+                # клиент увидит закрытие и переподключится, а не будет молча ждать событий
+                closing = asyncio.create_task(self._close(websocket, 1011, "Send timeout"))
+                self._closing.add(closing)
+                closing.add_done_callback(self._closing.discard)
+            return False
+
+    async def _reap(self, websocket: WebSocket):
+        info = self.active_connections.get(websocket)
+        if info is None:
+            return
+        logger.info(f"💤 Закрываем неактивное соединение {info.client}: "
+                    f"нет сообщений {info.idle_for(time.monotonic()):.0f} с")
+        self.disconnect(websocket)
+        metrics.websocket_reaped.inc()
+        await self._close(websocket, 1001, "Heartbeat timeout")
+
+    @staticmethod
+    async def _close(websocket: WebSocket, code: int, reason: str):
+        try:
+            await asyncio.wait_for(websocket.close(code=code, reason=reason), SEND_TIMEOUT)
+        except Exception:
+            # Соединение уже разорвано - достаточно забыть о нём
+            pass
     
-    async def broadcast(self, message: dict):
+    async def broadcast(self, message: dict, relay: bool = True):
         """
         Отправка сообщения всем подключенным клиентам
+
+        При включённом окне слияния (WS_COALESCE_MS) сообщение попадает
+        в буфер и отправляется вместе с остальными событиями окна.
         
         Args:
             message: Словарь с данными для отправки
+            relay: Передать событие другим процессам (False - событие уже пришло от другого процесса)
         """
-        disconnected = []
-        
-        logger.debug(f"📢 Broadcast: {message.get('type')} → {len(self.active_connections)} клиентов")
-        
-        for connection in self.active_connections:
+        if relay:
+            event_relay.publish(message)
+
+        if COALESCE_MS <= 0:
+            self._queued += 1
             try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.error(f"Ошибка отправки сообщения: {e}")
-                disconnected.append(connection)
+                async with self._send_lock:
+                    await self._send_all(message)
+            finally:
+                self._queued -= 1
+            return
+
+        self._coalescer.add(message)
+        if self._flush is None:
+            self._flush = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(COALESCE_MS / 1000)
+        self._flush = None
+        await self.flush()
+
+    async def flush(self):
+        """
+        Отправить события, накопленные в окне слияния
+
+        Одно событие уходит как есть, несколько - одним кадром
+        {"type": "batch", "events": [...]} в исходном порядке. Буфер
+        забирается под блокировкой, поэтому окно, закрывшееся во время
+        отправки предыдущего, не обгонит его.
+        """
+        async with self._send_lock:
+            events = self._coalescer.drain()
+            merged, self._coalescer.merged = self._coalescer.merged, 0
+            if merged:
+                metrics.websocket_coalesced_events.inc(merged)
+            if not events:
+                return
+            self._queued += len(events)
+            try:
+                if len(events) == 1:
+                    await self._send_all(events[0])
+                else:
+                    await self._send_all({"type": "batch", "events": events})
+            finally:
+                self._queued -= len(events)
+
+    async def _send_all(self, message: dict):
+        """
+        Отправить сообщение всем клиентам параллельно
+
+        Каждая отправка ограничена WS_SEND_TIMEOUT: зависший клиент не
+        задерживает рассылку дольше таймаута и отключается.
+        """
+        logger.debug(f"📢 Broadcast: {message.get('type')} → {len(self.active_connections)} клиентов")
         
-        # Удаляем отключенные соединения
-        for conn in disconnected:
-            self.disconnect(conn)
+        started = time.perf_counter()
+        try:
+            with profile_section("broadcast"):
+                # Сообщение кодируется один раз на кодировку, а не на каждого клиента
+                frames: Dict[str, Union[str, bytes]] = {}
+                sends = []
+                for connection, info in list(self.active_connections.items()):
+                    frame = frames.get(info.encoding)
+                    if frame is None:
+                        frame = frames[info.encoding] = encode(message, info.encoding)
+                    sends.append(self._send_frame_with_timeout(connection, frame))
+                results = await asyncio.gather(*sends)
+        finally:
+            metrics.websocket_broadcast_duration.observe(
+                time.perf_counter() - started, str(message.get("type"))
+            )
+
+        failed = results.count(False)
+        if failed:
+            logger.error(f"Ошибка отправки сообщения {message.get('type')}: не доставлено {failed} клиентам "
+                         f"(ошибка или таймаут {SEND_TIMEOUT:g} с), соединения отключены")
     
     async def send_personal(self, message: dict, websocket: WebSocket):
         """
@@ -76,11 +314,22 @@ class ConnectionManager:
             websocket: WebSocket соединение получателя
         """
         try:
-            await websocket.send_json(message)
+            await self._send_frame(websocket, self._encode_for(websocket, message))
         except Exception as e:
             logger.error(f"Ошибка отправки личного сообщения: {e}")
             self.disconnect(websocket)
 
+    def _encode_for(self, websocket: WebSocket, message: dict) -> Union[str, bytes]:
+        info = self.active_connections.get(websocket)
+        return encode(message, info.encoding if info is not None else JSON)
+
+    @staticmethod
+    async def _send_frame(websocket: WebSocket, frame: Union[str, bytes]):
+        if isinstance(frame, bytes):
+            await websocket.send_bytes(frame)
+        else:
+            await websocket.send_text(frame)
+
 
 # Глобальный экземпляр менеджера
 manager = ConnectionManager()
@@ -0,0 +1,290 @@
+"""
+Event Relay
+Пересылка WebSocket событий между процессами через PostgreSQL LISTEN / NOTIFY
+
+Каждый воркер uvicorn / gunicorn (и каждый контейнер) держит своих
+WebSocket клиентов и свой индекс дедлайнов. Событие, разосланное одним
+процессом, публикуется в канал NOTIFY; остальные процессы получают его
+на выделенном соединении LISTEN, обновляют свои индексы и рассылают
+событие своим клиентам.
+
+- Публикация не блокирует запрос: события ставятся в очередь, одна задача
+  отправляет накопившиеся события одной транзакцией в порядке рассылки
+- Полезная нагрузка NOTIFY ограничена 8000 байт: длинное событие
+  делится на части и собирается получателем
+- Свои события процесс не получает повторно (отметка процесса в заголовке)
+- События дедлайнов не пересылаются: каждый процесс следит за
+  дедлайнами по своему индексу
+- После обрыва LISTEN соединения оно переподключается, а индексы
+  перечитываются из БД (события за время обрыва потеряны)
+
+На SQLite канала между процессами нет, поэтому запуск с
+WEB_CONCURRENCY > 1 на SQLite отклоняется.
+"""
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import os
+import uuid
+
+from sqlalchemy import text
+
+from ..database import get_engine, is_sqlite
+from ..monitoring import metrics
+
+logger = logging.getLogger(__name__)
+
+# Число воркеров uvicorn / gunicorn
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# Канал NOTIFY для событий
+EVENT_RELAY_CHANNEL = os.getenv("EVENT_RELAY_CHANNEL", "todo_events")
+
+# Пауза перед повторным подключением LISTEN соединения, секунды
+EVENT_RELAY_RECONNECT_DELAY = float(os.getenv("EVENT_RELAY_RECONNECT_DELAY", "1"))
+
+# Размер части события (JSON в ASCII: символ = байт), запас под заголовок до лимита 8000 байт
+CHUNK_SIZE = 7800
+
+# События, которые каждый процесс порождает сам
+LOCAL_EVENTS = ("task_overdue", "sla_breach")
+
+# Обработчик события другого процесса
+Handler = Callable[[dict], Awaitable[None]]
+
+
+class EventRelay:
+    """
+    Межпроцессный канал событий
+
+    Отвечает за:
+    - Очередь исходящих событий и их отправку через pg_notify
+    - Выделенное LISTEN соединение и сборку входящих событий из частей
+    - Вызов подписчиков в порядке поступления событий
+    - Переподключение и перечитывание индексов после обрыва
+    """
+
+    def __init__(self):
+        # Отметка процесса: по ней отбрасываются собственные события
+        self.origin = uuid.uuid4().hex[:12]
+        self._handlers: List[Handler] = []
+        self._reload_handlers: List[Callable[[], None]] = []
+        self._outgoing: Optional[asyncio.Queue] = None
+        self._incoming: Optional[asyncio.Queue] = None
+        self._publisher: Optional[asyncio.Task] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._reconnect: Optional[asyncio.Task] = None
+        self._connection = None
+        self._fileno: Optional[int] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Номер исходящего события и части входящих: (origin, номер) -> части
+        self._sequence = 0
+        self._parts: Dict[Tuple[str, str], List[Optional[str]]] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._publisher is not None
+
+    def subscribe(self, handler: Handler):
+        """
+        Подписаться на события других процессов
+
+        Обработчики вызываются по очереди в порядке подписки, события -
+        строго в порядке поступления.
+        """
+        self._handlers.append(handler)
+
+    def on_reload(self, handler: Callable[[], None]):
+        """Перечитать индексы из БД после переподключения LISTEN соединения"""
+        self._reload_handlers.append(handler)
+
+    def publish(self, message: dict):
+        """
+        Поставить событие в очередь отправки другим процессам
+
+        Args:
+            message: Событие, уже разосланное клиентам этого процесса
+        """
+        if self._outgoing is None or message.get("type") in LOCAL_EVENTS:
+            return
+        self._outgoing.put_nowait(message)
+
+    async def start(self):
+        """
+        Подключиться к каналу (только PostgreSQL)
+
+        Raises:
+            RuntimeError: SQLite при WEB_CONCURRENCY > 1
+        """
+        if self.running:
+            return
+        if is_sqlite():
+            if WEB_CONCURRENCY > 1:
+                raise RuntimeError(
+                    f"WEB_CONCURRENCY={WEB_CONCURRENCY}: на SQLite WebSocket события и индекс дедлайнов "
+                    "не передаются между воркерами - запускайте один воркер или используйте PostgreSQL"
+                )
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._outgoing = asyncio.Queue()
+        self._incoming = asyncio.Queue()
+        await asyncio.to_thread(self._connect)
+        self._dispatcher = asyncio.create_task(self._run_dispatcher())
+        self._publisher = asyncio.create_task(self._run_publisher())
+        logger.info(f"📡 Event relay запущен: канал '{EVENT_RELAY_CHANNEL}', процесс {self.origin}")
+
+    async def stop(self):
+        """Отправить оставшиеся события и закрыть LISTEN соединение"""
+        if not self.running:
+            return
+        for task in (self._publisher, self._dispatcher, self._reconnect):
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._publisher = self._dispatcher = self._reconnect = None
+
+        pending = self._drain()
+        self._outgoing = self._incoming = None
+        if pending:
+            try:
+                await asyncio.to_thread(self._notify, self._encode_all(pending))
+            except Exception as e:
+                logger.error(f"📡 Не удалось отправить {len(pending)} событий при остановке: {e}")
+        self._disconnect()
+        logger.info("📡 Event relay остановлен")
+
+    # --- Отправка ---
+
+    def _drain(self) -> List[dict]:
+        messages = []
+        while self._outgoing is not None and not self._outgoing.empty():
+            messages.append(self._outgoing.get_nowait())
+        return messages
+
+    async def _run_publisher(self):
+        while True:
+            messages = [await self._outgoing.get()]
+            messages.extend(self._drain())
+            try:
+                await asyncio.to_thread(self._notify, self._encode_all(messages))
+                metrics.event_relay_messages.inc(len(messages), "sent")
+            except Exception as e:
+                logger.error(f"📡 Ошибка отправки {len(messages)} событий другим процессам: {e}")
+
+    @staticmethod
+    def _notify(payloads: List[str]):
+        # Одна транзакция: получатели видят события в порядке отправки
+        with get_engine().begin() as connection:
+            connection.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                [{"channel": EVENT_RELAY_CHANNEL, "payload": payload} for payload in payloads]
+            )
+
+    def _encode_all(self, messages: List[dict]) -> List[str]:
+        return [payload for message in messages for payload in self._encode(message)]
+
+    def _encode(self, message: dict) -> List[str]:
+        self._sequence += 1
+        data = json.dumps(message, ensure_ascii=True, separators=(",", ":"), default=str)
+        chunks = [data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE)] or [""]
+        return [
+            f"{self.origin}:{self._sequence}:{index}:{len(chunks)}:{chunk}"
+            for index, chunk in enumerate(chunks)
+        ]
+
+    # --- Приём ---
+
+    def _connect(self):
+        # Отдельное соединение вне пула: оно всё время ждёт уведомлений
+        pooled = get_engine().raw_connection()
+        connection = pooled.driver_connection
+        pooled.detach()
+        connection.rollback()
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN "{EVENT_RELAY_CHANNEL}"')
+        self._connection = connection
+        self._fileno = connection.fileno()
+        self._parts.clear()
+        self._loop.call_soon_threadsafe(self._loop.add_reader, self._fileno, self._on_readable)
+
+    def _disconnect(self):
+        if self._connection is None:
+            return
+        self._loop.remove_reader(self._fileno)
+        try:
+            self._connection.close()
+        except Exception:
+            pass
+        self._connection = None
+
+    def _on_readable(self):
+        connection = self._connection
+        try:
+            connection.poll()
+        except Exception as e:
+            logger.error(f"📡 LISTEN соединение потеряно: {e}")
+            self._disconnect()
+            if self._reconnect is None:
+                self._reconnect = asyncio.create_task(self._run_reconnect())
+            return
+        while connection.notifies:
+            self._receive(connection.notifies.pop(0).payload)
+
+    def _receive(self, payload: str):
+        try:
+            origin, sequence, index, count, chunk = payload.split(":", 4)
+            index, count = int(index), int(count)
+        except ValueError:
+            logger.warning(f"📡 Неизвестный формат уведомления: {payload[:80]}")
+            return
+        if origin == self.origin:
+            return
+
+        parts = self._parts.setdefault((origin, sequence), [None] * count)
+        parts[index] = chunk
+        if any(part is None for part in parts):
+            return
+        del self._parts[(origin, sequence)]
+        self._incoming.put_nowait(json.loads("".join(parts)))
+
+    async def _run_dispatcher(self):
+        while True:
+            message = await self._incoming.get()
+            metrics.event_relay_messages.inc(1, "received")
+            for handler in self._handlers:
+                try:
+                    await handler(message)
+                except Exception as e:
+                    logger.error(f"📡 Ошибка обработки события {message.get('type')} другого процесса: {e}")
+
+    async def _run_reconnect(self):
+        try:
+            while True:
+                await asyncio.sleep(EVENT_RELAY_RECONNECT_DELAY)
+                try:
+                    await asyncio.to_thread(self._connect)
+                except Exception as e:
+                    logger.error(f"📡 Переподключение LISTEN не удалось: {e}")
+                    continue
+                # Пропущенные за время обрыва события восстанавливаются чтением из БД
+                # (в цикле событий: индексы не рассчитаны на доступ из других потоков)
+                for handler in self._reload_handlers:
+                    try:
+                        handler()
+                    except Exception as e:
+                        logger.error(f"📡 Ошибка перечитывания индекса: {e}")
+                logger.info("📡 LISTEN соединение восстановлено")
+                return
+        finally:
+            self._reconnect = None
+
+
+# Глобальный экземпляр канала событий
+event_relay = EventRelay()
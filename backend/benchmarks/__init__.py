@@ -0,0 +1,3 @@
+"""
+Нагрузочные тесты и бенчмарки REST и WebSocket
+"""
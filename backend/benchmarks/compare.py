@@ -0,0 +1,86 @@
+"""
+Сравнение двух результатов бенчмарка
+
+Запуск из папки backend:
+    python -m benchmarks.compare benchmarks/results/before.json benchmarks/results/after.json
+"""
+from typing import Dict, List, Optional, Tuple
+import argparse
+import json
+import sys
+
+# Метрики, где рост - это регрессия
+LOWER_IS_BETTER = "lower"
+HIGHER_IS_BETTER = "higher"
+
+
+def _metrics(result: Dict) -> List[Tuple[str, Optional[float], str]]:
+    rest = result["rest"]
+    ws = result["websocket"]
+    rows = [
+        ("rest.throughput_rps", rest["throughput_rps"], HIGHER_IS_BETTER),
+        ("rest.p50_ms", rest["overall"]["p50_ms"], LOWER_IS_BETTER),
+        ("rest.p99_ms", rest["overall"]["p99_ms"], LOWER_IS_BETTER),
+    ]
+    for name, summary in sorted(rest["operations"].items()):
+        rows.append((f"rest.{name}.p50_ms", summary["p50_ms"], LOWER_IS_BETTER))
+        rows.append((f"rest.{name}.p99_ms", summary["p99_ms"], LOWER_IS_BETTER))
+    rows.extend([
+        ("ws.delivery.p50_ms", ws["delivery"]["p50_ms"], LOWER_IS_BETTER),
+        ("ws.delivery.p99_ms", ws["delivery"]["p99_ms"], LOWER_IS_BETTER),
+        ("ws.delivered", ws["delivered"], HIGHER_IS_BETTER),
+        ("ws.frames", ws.get("frames"), LOWER_IS_BETTER),
+    ])
+    return rows
+
+
+def compare(before: Dict, after: Dict, threshold: float) -> Tuple[List[str], bool]:
+    """
+    Построить таблицу сравнения
+
+    Returns:
+        (строки отчёта, есть ли регрессии больше threshold процентов)
+    """
+    after_values = {name: value for name, value, _ in _metrics(after)}
+    lines = [f"{'метрика':<28} {'до':>12} {'после':>12} {'Δ%':>8}"]
+    regressed = False
+
+    for name, old, direction in _metrics(before):
+        new = after_values.get(name)
+        if old is None or new is None or old == 0:
+            lines.append(f"{name:<28} {str(old):>12} {str(new):>12} {'—':>8}")
+            continue
+        delta = (new - old) / old * 100
+        worse = delta > threshold if direction == LOWER_IS_BETTER else delta < -threshold
+        regressed = regressed or worse
+        marker = " ⚠️" if worse else ""
+        lines.append(f"{name:<28} {old:>12} {new:>12} {delta:>+7.1f}%{marker}")
+
+    return lines, regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сравнение результатов benchmarks.run")
+    parser.add_argument("before", help="JSON результата до изменения")
+    parser.add_argument("after", help="JSON результата после изменения")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Порог регрессии в процентах (default: 10)")
+    args = parser.parse_args(argv)
+
+    with open(args.before, encoding="utf-8") as f:
+        before = json.load(f)
+    with open(args.after, encoding="utf-8") as f:
+        after = json.load(f)
+
+    if before["meta"]["params"] != after["meta"]["params"]:
+        print("⚠️  Параметры запусков различаются - сравнение может быть некорректным")
+
+    print(f"до:    {before['meta']['revision']} ({before['meta']['timestamp']})")
+    print(f"после: {after['meta']['revision']} ({after['meta']['timestamp']})")
+    lines, regressed = compare(before, after, args.threshold)
+    print("\n".join(lines))
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
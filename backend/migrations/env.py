@@ -0,0 +1,69 @@
+"""
+Окружение Alembic для миграций схемы задач
+"""
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+
+from app.database.session import Base, DATABASE_URL, is_sqlite, normalize_url
+from app import models  # noqa: F401 - регистрирует модели в Base.metadata
+
+config = context.config
+# % в пароле экранируется - значения конфига Alembic проходят интерполяцию configparser
+_url = config.get_main_option("sqlalchemy.url") or normalize_url(DATABASE_URL)
+config.set_main_option("sqlalchemy.url", _url.replace("%", "%%"))
+
+target_metadata = Base.metadata
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """
+    Autogenerate: не сравнивать объекты, созданные только для другого диалекта
+
+    Индексы с .ddl_if(dialect="postgresql") (GIN по JSON полям) на SQLite
+    не создаются, и без фильтра autogenerate на SQLite добавлял бы их в
+    каждую новую миграцию.
+    """
+    ddl_if = getattr(object, "_ddl_if", None)
+    if ddl_if is not None and ddl_if.dialect is not None:
+        return context.get_context().dialect.name == ddl_if.dialect
+    return True
+
+
+def run_migrations_offline() -> None:
+    """Генерация SQL без подключения к БД (alembic upgrade --sql)"""
+    url = config.get_main_option("sqlalchemy.url")
+    context.configure(
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=is_sqlite(url),
+        include_object=include_object,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Применение миграций к БД"""
+    url = config.get_main_option("sqlalchemy.url")
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            # SQLite не умеет ALTER COLUMN - используем batch режим
+            render_as_batch=is_sqlite(url),
+            include_object=include_object,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
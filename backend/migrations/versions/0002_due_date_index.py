@@ -0,0 +1,25 @@
+"""index tasks.due_date for the deadline watcher
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 12:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Индекс мог уже появиться через create_all в промежуточных версиях
+    indexes = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('tasks')}
+    if 'ix_tasks_due_date' not in indexes:
+        op.create_index('ix_tasks_due_date', 'tasks', ['due_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_due_date', table_name='tasks')
@@ -0,0 +1,93 @@
+"""archive table for completed tasks
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 16:00:00
+
+tasks_archive повторяет колонки tasks и хранит archived_at.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'tasks_archive',
+        # 1.1. Идентификация и описание
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('key', sa.String(length=50), nullable=True),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('type', sa.String(length=50), nullable=True),
+        # 1.2. Статус и жизненный цикл
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('resolution', sa.String(length=50), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('version', sa.Integer(), server_default='1', nullable=False),
+        # 1.3. Ответственность и владение
+        sa.Column('assignee', sa.String(length=100), nullable=True),
+        sa.Column('reporter', sa.String(length=100), nullable=True),
+        sa.Column('watchers', sa.JSON(), nullable=True),
+        # 1.4. Приоритет и срочность
+        sa.Column('priority', sa.String(length=50), nullable=False),
+        sa.Column('severity', sa.String(length=50), nullable=True),
+        sa.Column('due_date', sa.Date(), nullable=True),
+        sa.Column('sla', sa.String(length=100), nullable=True),
+        # 1.5. Планирование и оценка
+        sa.Column('estimate', sa.String(length=50), nullable=True),
+        sa.Column('original_estimate', sa.String(length=50), nullable=True),
+        sa.Column('remaining_estimate', sa.String(length=50), nullable=True),
+        sa.Column('time_spent', sa.String(length=50), nullable=True),
+        sa.Column('start_date', sa.Date(), nullable=True),
+        # 1.6. Связи и структура
+        sa.Column('project_id', sa.Integer(), nullable=True),
+        sa.Column('parent_id', sa.Integer(), nullable=True),
+        sa.Column('subtasks', sa.JSON(), nullable=True),
+        sa.Column('dependencies', sa.JSON(), nullable=True),
+        sa.Column('links', sa.JSON(), nullable=True),
+        # 1.7. Классификация и группировка
+        sa.Column('labels', sa.JSON(), nullable=True),
+        sa.Column('components', sa.JSON(), nullable=True),
+        sa.Column('epic_id', sa.Integer(), nullable=True),
+        sa.Column('sprint_id', sa.Integer(), nullable=True),
+        sa.Column('milestone', sa.String(length=100), nullable=True),
+        # 2. Контекст выполнения
+        sa.Column('location', sa.String(length=50), nullable=True),
+        sa.Column('tools_required', sa.JSON(), nullable=True),
+        sa.Column('environment', sa.String(length=50), nullable=True),
+        sa.Column('connectivity', sa.String(length=50), nullable=True),
+        sa.Column('execution_mode', sa.String(length=50), nullable=True),
+        # 3. Рутинность и повторяемость
+        sa.Column('is_repeatable', sa.Boolean(), nullable=False),
+        sa.Column('recurrence_rule', sa.String(length=100), nullable=True),
+        sa.Column('routine_type', sa.String(length=50), nullable=True),
+        sa.Column('maintenance_level', sa.String(length=50), nullable=True),
+        sa.Column('skip_penalty', sa.Text(), nullable=True),
+        # Архив
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_tasks_archive_id', 'tasks_archive', ['id'], unique=False)
+    op.create_index('ix_tasks_archive_key', 'tasks_archive', ['key'], unique=True)
+    op.create_index('ix_tasks_archive_due_date', 'tasks_archive', ['due_date'], unique=False)
+    op.create_index('ix_tasks_archive_completed_at', 'tasks_archive', ['completed_at'], unique=False)
+
+    # Выборка кандидатов на архивацию из рабочей таблицы
+    op.create_index('ix_tasks_status_completed_at', 'tasks', ['status', 'completed_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_status_completed_at', table_name='tasks')
+    op.drop_index('ix_tasks_archive_completed_at', table_name='tasks_archive')
+    op.drop_index('ix_tasks_archive_due_date', table_name='tasks_archive')
+    op.drop_index('ix_tasks_archive_key', table_name='tasks_archive')
+    op.drop_index('ix_tasks_archive_id', table_name='tasks_archive')
+    op.drop_table('tasks_archive')
@@ -0,0 +1,23 @@
+"""index execution context columns for GET /api/tasks/next
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 18:00:00
+"""
+from alembic import op
+
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_tasks_context', 'tasks', ['status', 'location', 'connectivity', 'environment'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_context', table_name='tasks')
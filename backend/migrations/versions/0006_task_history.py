@@ -0,0 +1,65 @@
+"""task change journal and history snapshots
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 20:00:00
+
+task_changes - журнал изменений задач, history_snapshots / task_snapshots -
+периодические снимки для восстановления состояния на момент времени.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'task_changes',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('task_id', sa.Integer(), nullable=False),
+        sa.Column('changed_at', sa.DateTime(), nullable=False),
+        sa.Column('action', sa.String(length=20), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=True),
+        sa.Column('session_id', sa.String(length=100), nullable=True),
+        sa.Column('changes', sa.JSON(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_task_changes_changed_at', 'task_changes', ['changed_at'], unique=False)
+    op.create_index('ix_task_changes_task_id_id', 'task_changes', ['task_id', 'id'], unique=False)
+
+    op.create_table(
+        'history_snapshots',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('taken_at', sa.DateTime(), nullable=False),
+        sa.Column('last_change_id', sa.Integer(), nullable=False),
+        sa.Column('task_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_history_snapshots_taken_at', 'history_snapshots', ['taken_at'], unique=False)
+
+    op.create_table(
+        'task_snapshots',
+        sa.Column('snapshot_id', sa.Integer(), nullable=False),
+        sa.Column('task_id', sa.Integer(), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(['snapshot_id'], ['history_snapshots.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('snapshot_id', 'task_id'),
+    )
+    op.create_index(
+        'ix_task_snapshots_task_id_snapshot_id', 'task_snapshots', ['task_id', 'snapshot_id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_task_snapshots_task_id_snapshot_id', table_name='task_snapshots')
+    op.drop_table('task_snapshots')
+    op.drop_index('ix_history_snapshots_taken_at', table_name='history_snapshots')
+    op.drop_table('history_snapshots')
+    op.drop_index('ix_task_changes_task_id_id', table_name='task_changes')
+    op.drop_index('ix_task_changes_changed_at', table_name='task_changes')
+    op.drop_table('task_changes')
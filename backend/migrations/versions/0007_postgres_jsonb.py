@@ -0,0 +1,69 @@
+"""JSONB columns and GIN indexes on PostgreSQL
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 22:00:00
+
+На PostgreSQL JSON колонки переводятся в JSONB, по спискам задачи
+строятся GIN индексы. На SQLite миграция ничего не делает.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+TASK_JSON_COLUMNS = (
+    'watchers', 'subtasks', 'dependencies', 'links', 'labels', 'components', 'tools_required'
+)
+
+JSON_COLUMNS = {
+    'tasks': TASK_JSON_COLUMNS,
+    'tasks_archive': TASK_JSON_COLUMNS,
+    'task_changes': ('changes',),
+    'task_snapshots': ('data',),
+}
+
+GIN_COLUMNS = ('labels', 'components', 'tools_required', 'dependencies')
+
+
+def _is_postgresql() -> bool:
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def upgrade() -> None:
+    if not _is_postgresql():
+        return
+
+    for table, columns in JSON_COLUMNS.items():
+        for column in columns:
+            op.alter_column(
+                table, column,
+                type_=postgresql.JSONB(),
+                existing_type=sa.JSON(),
+                postgresql_using=f'{column}::jsonb',
+            )
+
+    for column in GIN_COLUMNS:
+        op.create_index(f'ix_tasks_{column}_gin', 'tasks', [column], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    if not _is_postgresql():
+        return
+
+    for column in GIN_COLUMNS:
+        op.drop_index(f'ix_tasks_{column}_gin', table_name='tasks')
+
+    for table, columns in JSON_COLUMNS.items():
+        for column in columns:
+            op.alter_column(
+                table, column,
+                type_=sa.JSON(),
+                existing_type=postgresql.JSONB(),
+                postgresql_using=f'{column}::json',
+            )
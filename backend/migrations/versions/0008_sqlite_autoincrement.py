@@ -0,0 +1,46 @@
+"""AUTOINCREMENT for tasks.id on SQLite
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-20 10:00:00
+
+Без AUTOINCREMENT SQLite выдаёт новой задаче MAX(rowid) + 1, и после
+архивации задачи с наибольшим ID её ID и key достаются следующей
+созданной задаче. Таблица tasks пересоздаётся с AUTOINCREMENT, счётчик
+в sqlite_sequence выставляется за максимальный ID из tasks и tasks_archive.
+На PostgreSQL (SERIAL не переиспользует значения) миграция ничего не делает.
+"""
+from alembic import op
+
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def _is_sqlite() -> bool:
+    return op.get_bind().dialect.name == 'sqlite'
+
+
+def upgrade() -> None:
+    if not _is_sqlite():
+        return
+
+    with op.batch_alter_table('tasks', recreate='always', table_kwargs={'sqlite_autoincrement': True}):
+        pass
+
+    op.execute("DELETE FROM sqlite_sequence WHERE name = 'tasks'")
+    op.execute(
+        "INSERT INTO sqlite_sequence (name, seq) SELECT 'tasks', MAX("
+        "(SELECT COALESCE(MAX(id), 0) FROM tasks), "
+        "(SELECT COALESCE(MAX(id), 0) FROM tasks_archive))"
+    )
+
+
+def downgrade() -> None:
+    if not _is_sqlite():
+        return
+
+    with op.batch_alter_table('tasks', recreate='always', table_kwargs={'sqlite_autoincrement': False}):
+        pass
@@ -0,0 +1,153 @@
+"""task_summary counters maintained by triggers on tasks
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-21 10:00:00
+
+Счётчики сводки по доске (статус, приоритет, исполнитель, спринт)
+хранятся в task_summary и меняются триггерами на tasks в той же
+транзакции, что и задача. Таблица заполняется из текущих задач.
+
+- PostgreSQL: триггеры уровня оператора с таблицами переходов - импорт
+  или перенос в архив порцией обновляет каждую корзину один раз, а
+  изменение, не затронувшее измерения сводки, её не трогает
+- SQLite: построчные триггеры (UPDATE OF только по колонкам сводки)
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+# Измерение сводки → колонка tasks
+DIMENSIONS = {
+    'status': 'status',
+    'priority': 'priority',
+    'assignee': 'assignee',
+    'sprint': 'sprint_id',
+}
+
+# Ключ корзины для пустого значения (как в app.services.summary)
+NONE_KEY = 'null'
+
+
+def _bucket(source: str, column: str) -> str:
+    return f"COALESCE(CAST({source}.{column} AS TEXT), '{NONE_KEY}')"
+
+
+def _deltas(source: str, diff: int) -> str:
+    return " UNION ALL ".join(
+        f"SELECT '{dimension}' AS dimension, {_bucket(source, column)} AS bucket, {diff} AS diff FROM {source}"
+        for dimension, column in DIMENSIONS.items()
+    )
+
+
+def _upsert_deltas(*sources: str) -> str:
+    """Один INSERT ... ON CONFLICT по сумме изменений из таблиц переходов (PostgreSQL)"""
+    deltas = " UNION ALL ".join(
+        _deltas(source, 1 if source == 'new_rows' else -1) for source in sources
+    )
+    # Порядок строк одинаков во всех транзакциях - блокировки корзин берутся без взаимных deadlock
+    return (
+        "INSERT INTO task_summary (dimension, bucket, count) "
+        f"SELECT dimension, bucket, SUM(diff) FROM ({deltas}) deltas "
+        "GROUP BY dimension, bucket HAVING SUM(diff) <> 0 ORDER BY dimension, bucket "
+        "ON CONFLICT (dimension, bucket) DO UPDATE SET count = task_summary.count + EXCLUDED.count;"
+    )
+
+
+def _sqlite_increment(dimension: str, column: str, condition: str = "") -> str:
+    # WHERE обязателен: без него SQLite принимает ON CONFLICT за часть SELECT
+    return (
+        f"INSERT INTO task_summary (dimension, bucket, count) "
+        f"SELECT '{dimension}', {_bucket('NEW', column)}, 1 WHERE {condition or '1'} "
+        "ON CONFLICT (dimension, bucket) DO UPDATE SET count = count + 1;"
+    )
+
+
+def _sqlite_decrement(dimension: str, column: str, condition: str = "") -> str:
+    return (
+        f"UPDATE task_summary SET count = count - 1 "
+        f"WHERE dimension = '{dimension}' AND bucket = {_bucket('OLD', column)}"
+        f"{' AND ' + condition if condition else ''};"
+    )
+
+
+def _create_sqlite_triggers() -> None:
+    columns = ", ".join(DIMENSIONS.values())
+    insert_body = " ".join(_sqlite_increment(dimension, column) for dimension, column in DIMENSIONS.items())
+    delete_body = " ".join(_sqlite_decrement(dimension, column) for dimension, column in DIMENSIONS.items())
+    update_body = " ".join(
+        _sqlite_decrement(dimension, column, f"NEW.{column} IS NOT OLD.{column}")
+        + " "
+        + _sqlite_increment(dimension, column, f"NEW.{column} IS NOT OLD.{column}")
+        for dimension, column in DIMENSIONS.items()
+    )
+    op.execute(f"CREATE TRIGGER tasks_summary_insert AFTER INSERT ON tasks BEGIN {insert_body} END")
+    op.execute(f"CREATE TRIGGER tasks_summary_delete AFTER DELETE ON tasks BEGIN {delete_body} END")
+    op.execute(f"CREATE TRIGGER tasks_summary_update AFTER UPDATE OF {columns} ON tasks BEGIN {update_body} END")
+
+
+def _create_postgresql_triggers() -> None:
+    op.execute(f"""
+        CREATE FUNCTION task_summary_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                {_upsert_deltas('new_rows')}
+            ELSIF TG_OP = 'DELETE' THEN
+                {_upsert_deltas('old_rows')}
+            ELSE
+                {_upsert_deltas('new_rows', 'old_rows')}
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute(
+        "CREATE TRIGGER tasks_summary_insert AFTER INSERT ON tasks REFERENCING NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION task_summary_apply()"
+    )
+    op.execute(
+        "CREATE TRIGGER tasks_summary_delete AFTER DELETE ON tasks REFERENCING OLD TABLE AS old_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION task_summary_apply()"
+    )
+    op.execute(
+        "CREATE TRIGGER tasks_summary_update AFTER UPDATE ON tasks "
+        "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION task_summary_apply()"
+    )
+
+
+def upgrade() -> None:
+    op.create_table(
+        'task_summary',
+        sa.Column('dimension', sa.String(length=20), nullable=False),
+        sa.Column('bucket', sa.String(length=100), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('dimension', 'bucket'),
+    )
+    for dimension, column in DIMENSIONS.items():
+        op.execute(
+            f"INSERT INTO task_summary (dimension, bucket, count) "
+            f"SELECT '{dimension}', {_bucket('tasks', column)}, COUNT(*) FROM tasks "
+            f"GROUP BY {_bucket('tasks', column)}"
+        )
+
+    if op.get_bind().dialect.name == 'postgresql':
+        _create_postgresql_triggers()
+    else:
+        _create_sqlite_triggers()
+
+
+def downgrade() -> None:
+    for trigger in ('tasks_summary_insert', 'tasks_summary_delete', 'tasks_summary_update'):
+        if op.get_bind().dialect.name == 'postgresql':
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger} ON tasks")
+        else:
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP FUNCTION IF EXISTS task_summary_apply()")
+    op.drop_table('task_summary')
@@ -22,8 +22,9 @@ else
 fi
 
 echo ""
-echo "✅ Готово! Запустите приложение - база данных создастся автоматически."
+echo "✅ Готово! Запустите приложение - в Docker схема создаётся миграциями автоматически."
 echo ""
 echo "Для запуска:"
-echo "  docker-compose up -d              # с Docker"
-echo "  uvicorn app.main:app --reload     # локально из папки backend"
+echo "  docker-compose up -d                  # с Docker"
+echo "  python -m app.database.migrations     # локально из папки backend: создать схему"
+echo "  uvicorn app.main:app --reload         # локально из папки backend"
@@ -22,4 +22,4 @@ echo ""
 echo "🚀 Теперь запустите приложение:"
 echo "   docker-compose up -d"
 echo ""
-echo "   База данных создастся автоматически с новой схемой!"
+echo "   База данных создастся миграциями (python -m app.database.migrations) при старте контейнера!"
@@ -2,7 +2,7 @@
  * API клиент для работы с задачами
  */
 
-import { Task, TaskCreate, TaskUpdate } from '../types/task';
+import { NextTask, NextTaskContext, Task, TaskChange, TaskCreate, TaskSummary, TaskUpdate } from '../types/task';
 
 // Динамическое определение URL на основе window.location
 const getApiBaseUrl = () => {
@@ -34,6 +34,59 @@ class TaskAPI {
     return response.json();
   }
 
+  /**
+   * Получить сводку по доске (счётчики по статусу, приоритету, исполнителю, спринту)
+   */
+  async getSummary(): Promise<TaskSummary> {
+    const response = await fetch(`${API_BASE_URL}/api/tasks/summary`);
+    if (!response.ok) {
+      throw new Error('Failed to fetch summary');
+    }
+    return response.json();
+  }
+
+  /**
+   * Подобрать задачи, которые можно сделать в текущем контексте
+   */
+  async getNextTasks(context: NextTaskContext = {}): Promise<NextTask[]> {
+    const params = new URLSearchParams();
+    for (const [key, value] of Object.entries(context)) {
+      if (value === undefined || value === null) continue;
+      params.set(key, Array.isArray(value) ? value.join(',') : String(value));
+    }
+    const response = await fetch(`${API_BASE_URL}/api/tasks/next?${params}`);
+    if (!response.ok) {
+      throw new Error('Failed to fetch next tasks');
+    }
+    return response.json();
+  }
+
+  /**
+   * Получить журнал изменений задачи (новые записи первыми)
+   */
+  async getTaskHistory(id: number): Promise<TaskChange[]> {
+    const response = await fetch(`${API_BASE_URL}/api/history/tasks/${id}`);
+    if (!response.ok) {
+      throw new Error(`Failed to fetch history of task ${id}`);
+    }
+    return response.json();
+  }
+
+  /**
+   * Получить состояние доски на момент времени
+   */
+  async getBoardAsOf(at: Date, filters: Record<string, string | number> = {}): Promise<Task[]> {
+    const params = new URLSearchParams({ at: at.toISOString() });
+    for (const [key, value] of Object.entries(filters)) {
+      params.set(key, String(value));
+    }
+    const response = await fetch(`${API_BASE_URL}/api/history/board?${params}`);
+    if (!response.ok) {
+      throw new Error('Failed to fetch board history');
+    }
+    return response.json();
+  }
+
   /**
    * Получить задачу по ID
    */
@@ -49,46 +49,63 @@ export const useWebSocket = () => {
         setIsConnected(true);
       };
 
+      const handleMessage = (message: WebSocketMessage) => {
+        // ℹ️ Убрали фильтрацию по session_id - обрабатываем все события
+        // Защита от дубликатов реализована в store (проверка exists)
+
+        switch (message.type) {
+          case 'batch':
+            // События, слитые сервером в окне коалесценции, в исходном порядке
+            message.events?.forEach(handleMessage);
+            break;
+          case 'ping':
+            // Heartbeat сервера: без ответа соединение закроется по таймауту
+            ws.send(JSON.stringify({ type: 'pong', ts: message.ts }));
+            break;
+          case 'task_created':
+            if (message.task) {
+              const isOwnEvent = message.session_id === SESSION_ID;
+              console.log(
+                isOwnEvent ? '➕ Подтверждение своей задачи:' : '➕ Задача от другого клиента:',
+                message.task.title
+              );
+              addTask(message.task);
+            }
+            break;
+          case 'task_updated':
+            if (message.task) {
+              const isOwnEvent = message.session_id === SESSION_ID;
+              console.log(
+                isOwnEvent ? '✏️  Подтверждение обновления:' : '✏️  Обновление от другого клиента:',
+                message.task.title
+              );
+              updateTask(message.task);
+            }
+            break;
+          case 'task_deleted':
+            if (message.task_id) {
+              const isOwnEvent = message.session_id === SESSION_ID;
+              console.log(
+                isOwnEvent ? '🗑️  Подтверждение удаления:' : '🗑️  Удаление от другого клиента:',
+                message.task_id
+              );
+              deleteTask(message.task_id);
+            }
+            break;
+          case 'tasks_archived':
+            // Завершённые задачи перенесены в архив - убираем из рабочего списка
+            message.task_ids?.forEach((taskId) => deleteTask(taskId));
+            break;
+        }
+      };
+
       ws.onmessage = (event) => {
         try {
           const message: WebSocketMessage = JSON.parse(event.data);
-          console.log('📩 WebSocket сообщение:', message);
-
-          // ℹ️ Убрали фильтрацию по session_id - обрабатываем все события
-          // Защита от дубликатов реализована в store (проверка exists)
-
-          switch (message.type) {
-            case 'task_created':
-              if (message.task) {
-                const isOwnEvent = message.session_id === SESSION_ID;
-                console.log(
-                  isOwnEvent ? '➕ Подтверждение своей задачи:' : '➕ Задача от другого клиента:',
-                  message.task.title
-                );
-                addTask(message.task);
-              }
-              break;
-            case 'task_updated':
-              if (message.task) {
-                const isOwnEvent = message.session_id === SESSION_ID;
-                console.log(
-                  isOwnEvent ? '✏️  Подтверждение обновления:' : '✏️  Обновление от другого клиента:',
-                  message.task.title
-                );
-                updateTask(message.task);
-              }
-              break;
-            case 'task_deleted':
-              if (message.task_id) {
-                const isOwnEvent = message.session_id === SESSION_ID;
-                console.log(
-                  isOwnEvent ? '🗑️  Подтверждение удаления:' : '🗑️  Удаление от другого клиента:',
-                  message.task_id
-                );
-                deleteTask(message.task_id);
-              }
-              break;
+          if (message.type !== 'ping') {
+            console.log('📩 WebSocket сообщение:', message);
           }
+          handleMessage(message);
         } catch (error) {
           console.error('Ошибка обработки WebSocket сообщения:', error);
         }
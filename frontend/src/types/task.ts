@@ -37,6 +37,7 @@ export interface Task {
   created_at: string;
   updated_at: string;
   completed_at?: string;
+  version?: number;
 
   // 1.3. Ответственность и владение
   assignee?: string;
@@ -185,8 +186,64 @@ export interface TaskUpdate {
 }
 
 export interface WebSocketMessage {
-  type: 'task_created' | 'task_updated' | 'task_deleted';
+  type:
+    | 'task_created'
+    | 'task_updated'
+    | 'task_deleted'
+    | 'tasks_archived'
+    | 'summary_changed'
+    | 'batch'
+    | 'ping'
+    | 'pong';
   task?: Task;
   task_id?: number;
+  task_ids?: number[];
   session_id?: string;
-}
\ No newline at end of file
+  ts?: number;
+  // summary_changed
+  total?: number;
+  changes?: Partial<Record<SummaryDimension, Record<string, number>>>;
+  // batch
+  events?: WebSocketMessage[];
+}
+
+// Сводка по доске (GET /api/tasks/summary), ключ "null" - пустое значение
+export type SummaryDimension = 'status' | 'priority' | 'assignee' | 'sprint';
+
+export interface TaskSummary {
+  total: number;
+  by_status: Record<string, number>;
+  by_priority: Record<string, number>;
+  by_assignee: Record<string, number>;
+  by_sprint: Record<string, number>;
+}
+// Контекст для подбора задач (GET /api/tasks/next)
+export interface NextTaskContext {
+  location?: Location;
+  tools?: string[];
+  environment?: Environment;
+  connectivity?: Connectivity;
+  execution_mode?: ExecutionMode;
+  maintenance_level?: string;
+  limit?: number;
+}
+
+export interface NextTask {
+  score: number;
+  reasons: string[];
+  task: Task;
+}
+
+// Запись журнала изменений (GET /api/history/tasks/{id})
+export interface TaskChange {
+  id: number;
+  task_id: number;
+  changed_at: string;
+  action: 'created' | 'updated' | 'deleted' | 'archived' | 'restored';
+  version?: number | null;
+  session_id?: string | null;
+  // created - все поля, updated - {поле: стало}, restored - {completed_at: стало}
+  changes?: Record<string, unknown> | null;
+  // updated / restored - {поле: было}, null - если неизвестно
+  previous?: Record<string, unknown> | null;
+}